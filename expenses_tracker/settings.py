@@ -1,5 +1,6 @@
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 load_dotenv()
@@ -24,12 +25,16 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Before staticfiles so runserver serves assets the way production does
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'tracker',  # Your app
 ]
 
 MIDDLEWARE = [
+    'tracker.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -61,12 +66,61 @@ WSGI_APPLICATION = 'expenses_tracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Pick a profile with DATABASE_PROFILE:
+#   sqlite        - plain SQLite file (development default)
+#   sqlite-tuned  - SQLite for several server workers: WAL journal so readers
+#                   don't block the writer, synchronous=NORMAL, a larger page
+#                   cache and mmap, a busy timeout, IMMEDIATE write transactions
+#                   (no lock-upgrade "database is locked" errors) and
+#                   persistent connections
+#   postgres      - PostgreSQL (psycopg2) configured from POSTGRES_* variables
+
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'expenses_tracker'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
+elif DATABASE_PROFILE == 'sqlite-tuned':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked"
+                'timeout': int(os.getenv('SQLITE_TIMEOUT', '20')),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-64000;'  # 64 MB
+                    'PRAGMA mmap_size=268435456;'  # 256 MB
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA foreign_keys=ON;'
+                ),
+            },
+        }
+    }
+elif DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}")
 
 
 # Password validation
@@ -109,7 +163,99 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'tracker/static'),
 ]
 
+# Served by WhiteNoise. collectstatic writes content-hashed copies of every
+# file plus .gz (and .br, with the brotli package installed) variants, and
+# hashed files are sent with a far-future immutable Cache-Control. The manifest
+# only exists after collectstatic, so tests override this with plain storage.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', 'True') == 'True'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
+# Load the page JS as one file built by `manage.py bundle_static`
+TRACKER_JS_BUNDLE = os.getenv('TRACKER_JS_BUNDLE', 'False') == 'True'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Tracker
+# Seed any missing months of the default year after `migrate`
+# (see also `python manage.py provision_months`)
+
+TRACKER_PROVISION_ON_MIGRATE = os.getenv('TRACKER_PROVISION_ON_MIGRATE', 'True') == 'True'
+
+# Year shown on the dashboard; earlier months load on demand in pages of this size
+TRACKER_DEFAULT_YEAR = int(os.getenv('TRACKER_DEFAULT_YEAR', '2025'))
+TRACKER_MONTHS_PAGE_SIZE = int(os.getenv('TRACKER_MONTHS_PAGE_SIZE', '12'))
+
+# Month groups and totals are cached per month and invalidated on write.
+# Invalidations only reach processes sharing the cache, so outside DEBUG
+# the default is the file backend, shared by every worker on the host;
+# local memory (TRACKER_CACHE_BACKEND=locmem) suits a single process.
+# Each month holds a few keys (groups, summary, version), and superseded
+# versions linger until they time out, so Django's default of 300 entries
+# is outgrown by a few years of history and culling would drop live keys.
+TRACKER_CACHE_MAX_ENTRIES = int(os.getenv('TRACKER_CACHE_MAX_ENTRIES', '20000'))
+if os.getenv('TRACKER_CACHE_BACKEND', 'locmem' if DEBUG else 'file') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('TRACKER_CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+            'OPTIONS': {'MAX_ENTRIES': TRACKER_CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tracker',
+            'OPTIONS': {'MAX_ENTRIES': TRACKER_CACHE_MAX_ENTRIES},
+        }
+    }
+
+TRACKER_CACHE_TIMEOUT = int(os.getenv('TRACKER_CACHE_TIMEOUT', str(60 * 60 * 24)))
+
+# Per-view SQL query budgets, keyed by URL name. Requests over budget are
+# logged, or fail with QueryBudgetExceeded in strict mode (which the tests
+# turn on). Streaming responses aren't budgeted, as most of their queries run
+# after the response is returned. Measurements are served locally at /metrics/.
+TRACKER_QUERY_BUDGETS = {
+    'entry_form': 10,
+    'month_history': 10,
+    'timeseries': 5,
+    'update_amount': 10,
+    'update_amounts': 10,
+    'add_account': 15,
+    # Moving one entry onto an account that already has that month merges the
+    # two and refreshes the month's summary: 16 queries, plus savepoints in tests
+    'update_account': 20,
+    'delete_account': 15,
+    # Polling may requeue a stale job
+    'job_status': 4,
+    'changes': 6,
+    # Admin entries changelist: a page is 4 queries at any table size; the
+    # re-value/copy actions post to the same URL
+    'tracker_monthlyentry_changelist': 15,
+}
+TRACKER_QUERY_BUDGET_STRICT = os.getenv('TRACKER_QUERY_BUDGET_STRICT', 'False') == 'True'
+
+# Background jobs for heavy maintenance (see tracker.jobs): each process runs
+# them on a small thread pool. One worker keeps them from competing for the
+# SQLite write lock. With TRACKER_JOBS_EAGER they run inline instead.
+TRACKER_JOB_WORKERS = int(os.getenv('TRACKER_JOB_WORKERS', '1'))
+TRACKER_JOBS_EAGER = os.getenv('TRACKER_JOBS_EAGER', 'False') == 'True'
+# A running job touches its heartbeat this often; one silent for
+# TRACKER_JOB_STALE_SECONDS (its process died) is queued again
+TRACKER_JOB_HEARTBEAT_SECONDS = int(os.getenv('TRACKER_JOB_HEARTBEAT_SECONDS', '15'))
+TRACKER_JOB_STALE_SECONDS = int(os.getenv('TRACKER_JOB_STALE_SECONDS', '120'))
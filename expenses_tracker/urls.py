@@ -1,10 +1,9 @@
 # expenses_tracker/urls.py
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
+# Static files are served by WhiteNoise (see STORAGES in settings)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('tracker.urls')),
-] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+]
@@ -1,10 +1,235 @@
-from django.contrib import admin
-from .models import MonthlyEntry
+from decimal import Decimal
+from typing import Optional
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F, Max, Min, Q
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .aggregation import refresh_summaries
+from .caching import bump_all, cached_by_generation
+from .models import Account, Job, MonthlyEntry
+
+
+# Tables up to this many rows are counted exactly (a bounded COUNT over an index)
+EXACT_COUNT_LIMIT = 10_000
+
+
+def _sqlite_analyzed_rows(table: str) -> Optional[int]:
+    """Row count recorded by the last ANALYZE, if it has run on this table"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return None
+        # The first number of any of the table's stat rows is its row count
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+        row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the size of a large unfiltered table rather than counting it.
+
+    Filtered changelists are narrowed through an index and still get an
+    exact count. The whole table is sized from the planner's row estimate
+    on PostgreSQL. On SQLite a bounded COUNT stops at EXACT_COUNT_LIMIT
+    rows; past that the size comes from the last ANALYZE, or else from the
+    span of ids still in the table (ids are never reused, so MAX(id) alone
+    would keep growing across resets).
+    """
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            return super().count
+        model = self.object_list.model
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [model._meta.db_table])
+                row = cursor.fetchone()
+            # -1 (or 0) until the table has been analysed
+            if row and row[0] > 0:
+                return row[0]
+        elif connection.vendor == 'sqlite':
+            counted = model.objects.order_by()[:EXACT_COUNT_LIMIT].count()
+            if counted < EXACT_COUNT_LIMIT:
+                return counted
+            estimate = _sqlite_analyzed_rows(model._meta.db_table)
+            if estimate is None:
+                span = model.objects.aggregate(first=Min('pk'), last=Max('pk'))
+                estimate = span['last'] - span['first'] + 1
+            return max(estimate, counted)
+        return super().count
+
+
+def bank_names():
+    """Distinct bank names, from the small account table (cached until accounts change)"""
+    return cached_by_generation('admin-bank-names', lambda: list(
+        Account.objects.order_by('bank_name').values_list('bank_name', flat=True).distinct()
+    ))
+
+
+class BankFilter(admin.SimpleListFilter):
+    """Bank filter whose options come from the accounts rather than a DISTINCT over every entry"""
+    title = 'bank'
+    parameter_name = 'bank'
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in bank_names()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(account__bank_name=self.value())
+        return queryset
+
+
+class EntryActionForm(ActionForm):
+    percent = forms.DecimalField(required=False, max_digits=7, decimal_places=2, label='Percent')
+    month = forms.DateField(
+        required=False, input_formats=['%Y-%m', '%Y-%m-%d'], label='Month',
+        widget=forms.TextInput(attrs={'placeholder': 'YYYY-MM', 'size': 8}),
+    )
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ('bank_name', 'account_name', 'account_type')
+    list_filter = ('account_type',)
+    search_fields = ('bank_name', 'account_name')
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change and 'account_type' in form.changed_data:
+                # Its amounts now count towards another type's totals
+                refresh_summaries(obj.entries.dates('date', 'month'))
+            # Account names appear in cached month groups and filter options
+            bump_all()
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            months = list(obj.entries.dates('date', 'month'))
+            # Cascades to the account's entries
+            super().delete_model(request, obj)
+            refresh_summaries(months)
+            bump_all()
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            months = list(MonthlyEntry.objects.filter(account__in=queryset).dates('date', 'month'))
+            super().delete_queryset(request, queryset)
+            refresh_summaries(months)
+            bump_all()
+
 
 @admin.register(MonthlyEntry)
 class MonthlyEntryAdmin(admin.ModelAdmin):
-    list_display = ('date', 'bank_name', 'account_name', 'account_type', 'amount')
-    list_filter = ('account_type', 'bank_name', 'date')
-    search_fields = ('bank_name', 'account_name', 'notes')
+    list_display = ('date', 'account__bank_name', 'account__account_name', 'account__account_type', 'amount')
+    list_filter = ('account__account_type', BankFilter)
+    list_select_related = ('account',)
+    # Prefix matches on the account, resolved in get_search_results
+    search_fields = ('^account__bank_name', '^account__account_name')
+    raw_id_fields = ('account',)
+    date_hierarchy = 'date'
+    # Unique (date, account), so the newest page is read straight off that index
+    ordering = ('-date', '-account_id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = EntryActionForm
+    actions = ['revalue_entries', 'copy_to_month']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match account names by prefix on the account table, then select entries by account id.
+
+        Entries are reached through the (account, date) index instead of a
+        LIKE over every entry's joined names, and notes aren't searched.
+        """
+        if not search_term.strip():
+            return queryset, False
+        accounts = Account.objects.all()
+        for term in search_term.split():
+            accounts = accounts.filter(Q(bank_name__istartswith=term) | Q(account_name__istartswith=term))
+        return queryset.filter(account__in=accounts), False
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old_date = form.initial.get('date') if change else None
+            super().save_model(request, obj, form, change)
+            refresh_summaries({obj.date, old_date} - {None})
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            refresh_summaries([obj.date])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            months = list(queryset.dates('date', 'month'))
+            super().delete_queryset(request, queryset)
+            refresh_summaries(months)
+
+    @admin.action(description='Re-value selected entries by a percentage')
+    def revalue_entries(self, request, queryset):
+        percent = self._action_value(request, 'percent')
+        if percent is None:
+            self.message_user(request, 'Enter a percentage to re-value by (e.g. 2.5 or -10).', messages.ERROR)
+            return
+        factor = 1 + percent / Decimal(100)
+        with transaction.atomic():
+            months = list(queryset.dates('date', 'month'))
+            # Rounded to whole pence in the database
+            updated = queryset.update(
+                amount=Cast(Round(F('amount') * factor), BigIntegerField()), updated_at=timezone.now()
+            )
+            refresh_summaries(months)
+        self.message_user(request, f"Re-valued {updated} entries by {percent}% across {len(months)} months.")
+
+    @admin.action(description='Copy selected entries to a month')
+    def copy_to_month(self, request, queryset):
+        month = self._action_value(request, 'month')
+        if month is None:
+            self.message_user(request, 'Enter the month to copy to (YYYY-MM).', messages.ERROR)
+            return
+        month = month.replace(day=1)
+
+        # Later months win when several selected entries share an account
+        rows = {
+            account_id: (amount, notes)
+            for account_id, amount, notes in queryset.order_by('date').values_list('account_id', 'amount', 'notes')
+        }
+        with transaction.atomic():
+            MonthlyEntry.objects.bulk_create(
+                [
+                    MonthlyEntry(date=month, account_id=account_id, amount=amount, notes=notes)
+                    for account_id, (amount, notes) in rows.items()
+                ],
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['date', 'account'],
+                update_fields=['amount', 'notes', 'updated_at'],
+            )
+            refresh_summaries([month])
+            # The month may be new
+            bump_all()
+        self.message_user(request, f"Copied {len(rows)} entries to {month.strftime('%B %Y')}.")
+
+    def _action_value(self, request, name):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid():
+            return None
+        return form.cleaned_data.get(name)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'total', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('kind', 'params', 'status', 'progress', 'total', 'result', 'error', 'created_at', 'started_at', 'heartbeat_at', 'finished_at')
 
 # Register your models here.
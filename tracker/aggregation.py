@@ -0,0 +1,192 @@
+from datetime import date
+from typing import Dict, Iterable
+
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .caching import bump_all, bump_months
+from .models import MonthlyEntry, MonthlySummary
+from .money import Money, MoneyField
+
+
+ACCOUNT_TYPES = [choice for choice, _ in MonthlyEntry.ACCOUNT_TYPE_CHOICES]
+
+# Precomputed template/JSON keys, e.g. 'Credit Cards' -> 'credit_cards'
+ACCOUNT_TYPE_KEYS = {account_type: account_type.lower().replace(' ', '_') for account_type in ACCOUNT_TYPES}
+
+# Account types counted as liabilities in the net-worth grand total
+LIABILITY_TYPES = {'Credit Cards'}
+
+ZERO = Money(0)
+
+
+def next_month(month_date: date) -> date:
+    """First day of the month after month_date"""
+    if month_date.month == 12:
+        return date(month_date.year + 1, 1, 1)
+    return date(month_date.year, month_date.month + 1, 1)
+
+
+def _month_range_queryset(months):
+    # A plain date range (not date__year/date__month) so the date index is usable
+    return MonthlyEntry.objects.filter(date__gte=min(months), date__lt=next_month(max(months)))
+
+
+def empty_totals() -> Dict[str, Money]:
+    """Return a totals dict with every account type (and the grand total) at zero"""
+    totals = {f"{key}_total": ZERO for key in ACCOUNT_TYPE_KEYS.values()}
+    totals['grand_total'] = ZERO
+    return totals
+
+
+def net_worth(totals: Dict[str, Money]) -> Money:
+    """Grand total from per-type totals (credit cards are liabilities so subtract them)"""
+    grand_total = ZERO
+    for account_type, key in ACCOUNT_TYPE_KEYS.items():
+        amount = totals.get(f"{key}_total", ZERO)
+        grand_total += -amount if account_type in LIABILITY_TYPES else amount
+    return grand_total
+
+
+def _add_to_totals(totals: Dict[str, Money], account_type: str, amount) -> None:
+    key = ACCOUNT_TYPE_KEYS.get(account_type)
+    if key is not None and amount is not None:
+        # An integer SUM over pence, so exact on every database
+        totals[f"{key}_total"] += amount
+
+
+def aggregate_totals(entries_queryset) -> Dict[str, Money]:
+    """Per-type totals and grand total for a queryset, in one grouped query"""
+    totals = empty_totals()
+    rows = (
+        entries_queryset.order_by()
+        .values_list('account__account_type')
+        .annotate(total=Sum('amount'))
+    )
+    for account_type, amount in rows:
+        _add_to_totals(totals, account_type, amount)
+    totals['grand_total'] = net_worth(totals)
+    return totals
+
+
+def aggregate_totals_by_month(entries_queryset) -> Dict[date, Dict[str, Money]]:
+    """Per-type totals and grand total for every month in a queryset, in one grouped query"""
+    totals_by_month: Dict[date, Dict[str, Money]] = {}
+    rows = (
+        entries_queryset.order_by()
+        .annotate(month=TruncMonth('date'))
+        .values_list('month', 'account__account_type')
+        .annotate(total=Sum('amount'))
+    )
+    for month, account_type, amount in rows:
+        if month not in totals_by_month:
+            totals_by_month[month] = empty_totals()
+        _add_to_totals(totals_by_month[month], account_type, amount)
+
+    for totals in totals_by_month.values():
+        totals['grand_total'] = net_worth(totals)
+    return totals_by_month
+
+
+def month_totals(month_date: date) -> Dict[str, Money]:
+    """Totals for the calendar month containing month_date"""
+    return aggregate_totals(_month_range_queryset([month_date.replace(day=1)]))
+
+
+def totals_for_months(months: Iterable[date]) -> Dict[date, Dict[str, Money]]:
+    """Totals for several months at once, keyed by first-of-month date"""
+    months = {month.replace(day=1) for month in months}
+    if not months:
+        return {}
+    totals_by_month = aggregate_totals_by_month(_month_range_queryset(months))
+    return {month: totals_by_month.get(month, empty_totals()) for month in sorted(months)}
+
+
+def summary_totals(summary: MonthlySummary) -> Dict[str, Money]:
+    """Totals dict (same shape as aggregate_totals) read from a summary row"""
+    totals = {f"{key}_total": getattr(summary, f"{key}_total") for key in ACCOUNT_TYPE_KEYS.values()}
+    totals['grand_total'] = summary.grand_total
+    return totals
+
+
+def stored_month_totals(month_date: date) -> Dict[str, Money]:
+    """Totals for the month containing month_date, read from its summary row (zero if it has none)"""
+    summary = MonthlySummary.objects.filter(month=month_date.replace(day=1)).first()
+    return summary_totals(summary) if summary else empty_totals()
+
+
+def refresh_summaries(months: Iterable[date]) -> None:
+    """Recompute the MonthlySummary rows for the given months from MonthlyEntry"""
+    months = {month.replace(day=1) for month in months}
+    if not months:
+        return
+
+    totals_by_month = {
+        month: totals for month, totals in aggregate_totals_by_month(_month_range_queryset(months)).items()
+        if month in months
+    }
+    with transaction.atomic():
+        stored = set(MonthlySummary.objects.filter(month__in=months).values_list('month', flat=True))
+        # Months with no entries left lose their summary row
+        dropped = stored - totals_by_month.keys()
+        if dropped:
+            MonthlySummary.objects.filter(month__in=dropped).delete()
+        MonthlySummary.objects.bulk_create(
+            [MonthlySummary(month=month, **totals) for month, totals in totals_by_month.items()],
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=[*empty_totals().keys(), 'updated_at'],
+        )
+        bump_months(months)
+        if dropped or totals_by_month.keys() - stored:
+            # The cached month lists gain or lose a month
+            bump_all()
+
+
+def rebuild_summaries() -> int:
+    """Drop and rebuild every MonthlySummary row from scratch"""
+    totals_by_month = aggregate_totals_by_month(MonthlyEntry.objects.all())
+    with transaction.atomic():
+        MonthlySummary.objects.all().delete()
+        MonthlySummary.objects.bulk_create(
+            [MonthlySummary(month=month, **totals) for month, totals in totals_by_month.items()]
+        )
+        bump_all()
+    return len(totals_by_month)
+
+
+def apply_amount_changes(deltas: Dict[date, Dict[str, Money]]) -> None:
+    """Incrementally adjust month summaries by per-type amount deltas, one UPDATE per month"""
+    for month_date, type_deltas in deltas.items():
+        changes = {}
+        grand_delta = ZERO
+        for account_type, delta in type_deltas.items():
+            key = ACCOUNT_TYPE_KEYS.get(account_type)
+            if key is None or not delta:
+                continue
+            changes[f"{key}_total"] = F(f"{key}_total") + Value(delta, output_field=MoneyField())
+            grand_delta += -delta if account_type in LIABILITY_TYPES else delta
+        if not changes:
+            continue
+
+        updated = MonthlySummary.objects.filter(month=month_date.replace(day=1)).update(
+            **changes,
+            grand_total=F('grand_total') + Value(grand_delta, output_field=MoneyField()),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            bump_months([month_date])
+        else:
+            refresh_summaries([month_date])
+
+
+def apply_amount_change(month_date: date, account_type: str, delta: Money) -> None:
+    """Incrementally adjust a month's summary after one entry's amount changes by delta"""
+    apply_amount_changes({month_date: {account_type: delta}})
+
+
+def as_json_totals(totals: Dict[str, Money]) -> Dict[str, float]:
+    """Convert exact totals to floats at the JSON boundary"""
+    return {key: float(value) for key, value in totals.items()}
@@ -0,0 +1,86 @@
+from collections import deque
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from .caching import cached_by_data_version
+from .models import MonthlySummary
+from .money import Money
+
+
+ROLLING_WINDOWS = (3, 12)
+
+PERCENT_PLACES = Decimal('0.01')
+
+
+def _rolling_average(window: deque, size: int) -> Optional[Money]:
+    return Money.sum(window) / size if len(window) == size else None
+
+
+def _month_index(month: date) -> int:
+    return month.year * 12 + month.month - 1
+
+
+def build_net_worth_series(points: List[tuple]) -> List[Dict[str, Any]]:
+    """Trend figures for (month, net_worth) points in month order.
+
+    One pass over the series: the delta from the previous calendar month,
+    rolling averages over the last 3 and 12 calendar months and
+    year-over-year growth (percent, against the same month a year earlier
+    when it is non-zero). Months without a point count as missing: a
+    figure that needs one of them is None rather than reaching further back.
+    """
+    windows = {size: deque(maxlen=size) for size in ROLLING_WINDOWS}
+    by_month: Dict[date, Money] = {}
+    previous: Optional[Money] = None
+    previous_index: Optional[int] = None
+    series = []
+
+    for month, value in points:
+        index = _month_index(month)
+        follows = previous_index is not None and index == previous_index + 1
+        for window in windows.values():
+            if not follows:
+                # A gap (or the first point): windows restart from this month
+                window.clear()
+            window.append(value)
+
+        year_ago = by_month.get(month.replace(year=month.year - 1))
+        by_month[month] = value
+
+        series.append({
+            'month': month,
+            'net_worth': value,
+            'delta': value - previous if follows else None,
+            **{f"rolling_{size}": _rolling_average(window, size) for size, window in windows.items()},
+            'yoy_growth': (
+                ((value - year_ago) / abs(year_ago) * 100).quantize(PERCENT_PLACES) if year_ago else None
+            ),
+        })
+        previous, previous_index = value, index
+
+    return series
+
+
+def _load_net_worth_series() -> List[Dict[str, Any]]:
+    points = MonthlySummary.objects.order_by('month').values_list('month', 'grand_total')
+    return build_net_worth_series(list(points))
+
+
+def net_worth_series() -> List[Dict[str, Any]]:
+    """Net worth and its trends for every stored month, oldest first (cached until the next write)"""
+    return cached_by_data_version('net-worth-series', _load_net_worth_series)
+
+
+def net_worth_point(month_date: date) -> Optional[Dict[str, Any]]:
+    """The series entry for the month containing month_date, if it has data"""
+    month_date = month_date.replace(day=1)
+    return next((point for point in reversed(net_worth_series()) if point['month'] == month_date), None)
+
+
+def as_json_point(point: Dict[str, Any]) -> Dict[str, Any]:
+    """Series entry with the month as 'YYYY-MM' and figures as floats"""
+    return {
+        key: value.strftime('%Y-%m') if key == 'month' else (None if value is None else float(value))
+        for key, value in point.items()
+    }
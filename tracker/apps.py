@@ -1,6 +1,37 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def provision_after_migrate(sender, using, **kwargs):
+    """Seed any missing months of DEFAULT_YEAR once the schema is in place"""
+    from django.conf import settings
+    from django.db import connections
+
+    from .models import Account, MonthlyEntry, MonthlySummary
+    from .provisioning import generate_year_data
+
+    if not getattr(settings, 'TRACKER_PROVISION_ON_MIGRATE', True):
+        return
+
+    # Skip partial migrations that stop before the tracker tables exist
+    tables = connections[using].introspection.table_names()
+    if not {Account._meta.db_table, MonthlyEntry._meta.db_table, MonthlySummary._meta.db_table} <= set(tables):
+        return
+
+    generate_year_data()
 
 
 class TrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracker'
+
+    def ready(self):
+        from .instrumentation import install_query_counter
+        from .jobs import resume_jobs_once
+
+        post_migrate.connect(provision_after_migrate, sender=self)
+        connection_created.connect(install_query_counter)
+        # Pick up jobs a previous server process left queued or running
+        request_started.connect(resume_jobs_once, dispatch_uid='tracker-resume-jobs')
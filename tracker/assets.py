@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import List, Optional
+
+
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+
+# Page scripts in load order (they share globals, so the order matters)
+TRACKER_SCRIPTS = [
+    'js/account-management.js',
+    'js/add-account.js',
+    'js/site-style-config.js',
+    'js/script.js',
+    'js/chart.js',
+    'js/background-animation.js',
+]
+
+TRACKER_BUNDLE = 'js/tracker.bundle.js'
+
+
+def _minifier():
+    try:
+        from rjsmin import jsmin
+    except ImportError:
+        return None
+    return jsmin
+
+
+def build_bundle(minify: bool = True, static_dir: Optional[Path] = None) -> Path:
+    """Concatenate TRACKER_SCRIPTS into TRACKER_BUNDLE, minified when rjsmin is installed.
+
+    The files are classic scripts sharing one global scope, so they are
+    joined as they are rather than wrapped. Returns the bundle's path.
+    """
+    static_dir = static_dir or STATIC_DIR
+    jsmin = _minifier() if minify else None
+
+    parts: List[str] = []
+    for name in TRACKER_SCRIPTS:
+        source = (static_dir / name).read_text(encoding='utf-8')
+        parts.append(f"/* {name} */\n{jsmin(source) if jsmin else source}")
+
+    bundle = static_dir / TRACKER_BUNDLE
+    # A ';' between files so one without a trailing semicolon can't run into the next
+    bundle.write_text('\n;\n'.join(parts) + '\n', encoding='utf-8')
+    return bundle
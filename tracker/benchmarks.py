@@ -0,0 +1,199 @@
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+
+from .aggregation import ACCOUNT_TYPES, next_month, rebuild_summaries
+from .instrumentation import RequestMetrics
+from .models import Account, MonthlyEntry
+from .money import Money
+from .provisioning import BULK_BATCH_SIZE, DEFAULT_YEAR, generate_year_data
+
+
+# Plain static URLs, so pages render without a collectstatic manifest
+BENCHMARK_STORAGES = {
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Cold-cache runs clear the cache, so use a private one rather than the file cache shared with the server
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmarks',
+        'OPTIONS': {'MAX_ENTRIES': settings.TRACKER_CACHE_MAX_ENTRIES},
+    },
+}
+
+BANKS = ['Barclays', 'Lloyds', 'HSBC', 'Nationwide', 'Santander', 'Monzo', 'Starling', 'Vanguard', 'Family']
+
+
+def generate_dataset(accounts: int = 50, years: int = 30, end_year: int = DEFAULT_YEAR, seed: int = 0) -> int:
+    """Fill the database with `accounts` accounts holding one entry per month for `years` years.
+
+    Balances follow a seeded random walk, so the same arguments always
+    produce the same data. Returns the number of entries created.
+    """
+    rng = random.Random(seed)
+    account_rows = Account.objects.bulk_create([
+        Account(
+            bank_name=BANKS[index % len(BANKS)],
+            account_name=f"Account {index + 1}",
+            account_type=ACCOUNT_TYPES[index % len(ACCOUNT_TYPES)],
+        )
+        for index in range(accounts)
+    ])
+    balances = {account.id: Money(rng.randint(0, 2_000_000)) for account in account_rows}
+
+    month_date = date(end_year - years + 1, 1, 1)
+    entries: List[MonthlyEntry] = []
+    created = 0
+    while month_date.year <= end_year:
+        for account_id, balance in balances.items():
+            balances[account_id] = balance + Money(rng.randint(-50_000, 60_000))
+            entries.append(MonthlyEntry(date=month_date, account_id=account_id, amount=balances[account_id], notes=''))
+        if len(entries) >= BULK_BATCH_SIZE * 10:
+            MonthlyEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+            created += len(entries)
+            entries = []
+        month_date = next_month(month_date)
+    MonthlyEntry.objects.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+    created += len(entries)
+
+    rebuild_summaries()
+    return created
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """Time func over `repeat` runs, then count its queries and peak memory in one more traced run"""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        queries = metrics.queries
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request['PATH_INFO']} returned {response.status_code}")
+    if response.get('Content-Type') == 'application/json' and response.json().get('success') is False:
+        raise RuntimeError(f"{response.request['PATH_INFO']} failed: {response.json().get('error')}")
+    return response
+
+
+def run_benchmarks(repeat: int = 5, dashboard_year: int = DEFAULT_YEAR) -> Dict[str, Dict[str, Any]]:
+    """Benchmark the views (through the test client) and helpers against the current database"""
+    from .views import calculate_totals, group_entries_by_month
+
+    client = Client()
+    admin_client = Client()
+    admin_client.force_login(
+        get_user_model().objects.filter(username='benchmark').first()
+        or get_user_model().objects.create_superuser('benchmark', 'benchmark@example.com', None)
+    )
+    year_start, year_end = date(dashboard_year, 1, 1), date(dashboard_year + 1, 1, 1)
+    month = date(dashboard_year, 6, 1)
+    month_entries = MonthlyEntry.objects.filter(date__gte=month, date__lt=next_month(month))
+    entry_ids = list(month_entries.order_by('id').values_list('id', flat=True))
+    account_numbers = count(1)
+    years = count(dashboard_year + 1)
+
+    def add_account():
+        _check(client.post('/add-account/', {
+            'bank_name': 'Benchmark', 'account_name': f"Account {next(account_numbers)}", 'account_type': 'Savings'
+        }))
+
+    def delete_account():
+        entry = MonthlyEntry.objects.filter(account__bank_name='Benchmark', date=month).first()
+        _check(client.post(f"/delete-account/{entry.id}/?all_months=true"))
+
+    def clear_cache():
+        # Looked up when called, so it clears the benchmarks' own cache
+        cache.clear()
+
+    def new_year():
+        # Each run provisions a year nobody has touched yet
+        generate_year_data(next(years))
+
+    benchmarks = {
+        'entry_form (cold cache)': (lambda: _check(client.get('/')), clear_cache),
+        'entry_form (warm cache)': (lambda: _check(client.get('/')), None),
+        'month_history page (cold cache)': (lambda: _check(client.get('/months/?page=1')), clear_cache),
+        'timeseries (cold cache)': (lambda: _check(client.get('/api/timeseries/')), clear_cache),
+        'update_amount': (lambda: _check(client.post(
+            f"/update-amount/{entry_ids[0]}/", {'amount': '123.45'}, content_type='application/json'
+        )), None),
+        'update_amounts (whole month)': (lambda: _check(client.post('/update-amounts/', {
+            'entries': [{'id': entry_id, 'amount': '10.00'} for entry_id in entry_ids]
+        }, content_type='application/json')), None),
+        'add_account': (add_account, None),
+        'delete_account (all months)': (delete_account, add_account),
+        'admin entries changelist': (lambda: _check(admin_client.get('/admin/tracker/monthlyentry/')), clear_cache),
+        'admin entries search': (lambda: _check(admin_client.get('/admin/tracker/monthlyentry/?q=barc')), None),
+        'group_entries_by_month (one year)': (lambda: group_entries_by_month(
+            MonthlyEntry.objects.filter(date__gte=year_start, date__lt=year_end)
+        ), None),
+        'calculate_totals (one month)': (lambda: calculate_totals(month_entries), None),
+        'generate_year_data (new year)': (new_year, None),
+    }
+
+    # Time the whole operation, not just queueing its job
+    with override_settings(TRACKER_JOBS_EAGER=True, STORAGES=BENCHMARK_STORAGES, CACHES=BENCHMARK_CACHES):
+        return {name: measure(func, repeat, setup) for name, (func, setup) in benchmarks.items()}
+
+
+def benchmark_report(accounts: int = 50, years: int = 30, repeat: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """Generate a dataset in the current (throwaway) database, benchmark it and describe the run"""
+    started = time.perf_counter()
+    entries = generate_dataset(accounts=accounts, years=years, seed=seed)
+    generate_seconds = time.perf_counter() - started
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'dataset': {
+            'accounts': accounts,
+            'years': years,
+            'entries': entries,
+            'seed': seed,
+            'generate_seconds': round(generate_seconds, 2),
+        },
+        'repeat': repeat,
+        'results': run_benchmarks(repeat),
+    }
@@ -0,0 +1,121 @@
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Bumped by writes that touch every month (renames, new accounts, resets)
+GENERATION_KEY = 'tracker:generation'
+
+# Bumped by every write, for values derived from all months at once
+LATEST_WRITE_KEY = 'tracker:latest-write'
+
+CACHE_TIMEOUT = getattr(settings, 'TRACKER_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _new_version() -> int:
+    # Time-based rather than a counter, so an evicted version key can never
+    # come back with a value that matches stale cached data
+    return time.time_ns()
+
+
+def _month_version_key(month_date: date) -> str:
+    return f"tracker:month-version:{month_date:%Y-%m}"
+
+
+def _versions(keys: List[str]) -> Dict[str, int]:
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def generation() -> int:
+    """Current data generation, changed by any write that touches every month"""
+    return _versions([GENERATION_KEY])[GENERATION_KEY]
+
+
+def month_versions(months: Iterable[date]) -> Dict[date, str]:
+    """Data version of each month, combining the generation and the month's own version"""
+    keys = {month: _month_version_key(month) for month in months}
+    versions = _versions([GENERATION_KEY, *keys.values()])
+    return {month: f"{versions[GENERATION_KEY]}.{versions[key]}" for month, key in keys.items()}
+
+
+def data_version() -> str:
+    """Version of the data as a whole, changed by any write"""
+    versions = _versions([GENERATION_KEY, LATEST_WRITE_KEY])
+    return f"{versions[GENERATION_KEY]}.{versions[LATEST_WRITE_KEY]}"
+
+
+def bump_months(months: Iterable[date]) -> None:
+    """Invalidate cached data for the given months once the current transaction commits.
+
+    The months are also recorded in the change feed, in the same transaction.
+    """
+    # changes imports aggregation, which imports this module
+    from .changes import record_change
+
+    months = {month.replace(day=1) for month in months}
+    if months:
+        record_change(months)
+        keys = {_month_version_key(month) for month in months} | {LATEST_WRITE_KEY}
+        transaction.on_commit(lambda: cache.set_many({key: _new_version() for key in keys}, None))
+
+
+def bump_all() -> None:
+    """Invalidate cached data for every month once the current transaction commits (and record it in the change feed)"""
+    from .changes import record_change
+
+    record_change(None)
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, _new_version(), None))
+
+
+def cached_by_month(
+    prefix: str,
+    months: Iterable[date],
+    loader: Callable[[List[date]], Dict[date, Any]],
+) -> Dict[date, Any]:
+    """Per-month values from the cache, loading only the missing months.
+
+    loader receives the months that missed and must return a value for
+    each of them (None for a month with no data).
+    """
+    months = sorted(set(months))
+    versions = month_versions(months)
+    keys = {month: f"tracker:{prefix}:{month:%Y-%m}:{versions[month]}" for month in months}
+
+    hits = cache.get_many(keys.values())
+    values = {month: hits[key] for month, key in keys.items() if key in hits}
+
+    missing = [month for month in months if month not in values]
+    if missing:
+        loaded = loader(missing)
+        loaded = {month: loaded.get(month) for month in missing}
+        cache.set_many({keys[month]: value for month, value in loaded.items()}, CACHE_TIMEOUT)
+        values.update(loaded)
+
+    return values
+
+
+def _cached(key: str, loader: Callable[[], Any]) -> Any:
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def cached_by_generation(name: str, loader: Callable[[], Any]) -> Any:
+    """A value that only changes when the whole data generation does"""
+    return _cached(f"tracker:{name}:{generation()}", loader)
+
+
+def cached_by_data_version(name: str, loader: Callable[[], Any]) -> Any:
+    """A value derived from every month, recomputed after any write"""
+    return _cached(f"tracker:{name}:{data_version()}", loader)
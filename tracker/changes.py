@@ -0,0 +1,124 @@
+import calendar
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from django.db.models import Min
+from django.utils import timezone
+
+from .aggregation import as_json_totals, empty_totals, summary_totals
+from .models import ChangeLog, MonthlyEntry, MonthlySummary
+
+
+# Rows kept in the change log; clients further behind are told to reload
+CHANGE_LOG_KEEP = 10_000
+
+# How long a write may take to commit after logging its change. Log ids
+# are allocated before commit, so on databases with concurrent writers
+# (PostgreSQL) a lower id can become visible after a higher one: the
+# cursor doesn't move past a gap in the ids until it is this old, and rows
+# edited this long before the cursor are sent again.
+RESEND_OVERLAP = timedelta(seconds=5)
+
+# Newest log rows latest_cursor() looks through for ones still settling
+LATEST_SCAN = 1000
+
+
+def record_change(months: Optional[Iterable[date]]) -> None:
+    """Append a write to the change log (months=None when every month may have changed).
+
+    Runs inside the writer's transaction, so the change is visible exactly
+    when the data is. Every thousandth change trims the log.
+    """
+    change = ChangeLog.objects.create(
+        months=None if months is None else sorted({month.replace(day=1).isoformat() for month in months})
+    )
+    if change.id % 1000 == 0:
+        ChangeLog.objects.filter(id__lte=change.id - CHANGE_LOG_KEEP).delete()
+
+
+def _committed_cursor(cursor: int, log) -> int:
+    """The furthest log id after which no earlier change can still commit.
+
+    A gap in the ids is a write still in flight, unless the change after it
+    was logged more than RESEND_OVERLAP ago (then the gap is a rollback).
+    """
+    settled_before = timezone.now() - RESEND_OVERLAP
+    for change_id, _, created_at in log:
+        if change_id != cursor + 1 and created_at > settled_before:
+            break
+        cursor = change_id
+    return cursor
+
+
+def latest_cursor() -> int:
+    """Cursor for "now": clients pass it back as ?since= to get later changes.
+
+    Like the feed's own cursors, it stops before changes that may still be
+    committing.
+    """
+    # The newest changes, walked back (by primary key) to the last one that has settled
+    newest = list(ChangeLog.objects.order_by('-id').values_list('id', 'months', 'created_at')[:LATEST_SCAN])
+    if not newest:
+        return 0
+    settled_before = timezone.now() - RESEND_OVERLAP
+    recent = []
+    for change in newest:
+        if change[2] <= settled_before:
+            return _committed_cursor(change[0], reversed(recent))
+        recent.append(change)
+    return _committed_cursor(newest[-1][0] - 1, reversed(recent))
+
+
+def _month_key(month_date: date) -> str:
+    # Same keys as views.get_month_key, which the page uses for its month elements
+    return f"{calendar.month_name[month_date.month]} {month_date.year}"
+
+
+def changes_since(cursor: int) -> Dict[str, Any]:
+    """Everything that changed after cursor, for the /changes/ feed.
+
+    For each changed month: its totals, the entries edited since the
+    cursor and the ids of all its current entries (so clients can drop
+    deleted rows). `reload` is set instead when a write touched every month
+    (renames, new accounts, imports, resets) or the cursor has been trimmed
+    from the log.
+
+    The returned cursor stops before any change that may still be
+    committing (see RESEND_OVERLAP), so changes after it can be sent again
+    on the next call; applying one twice is harmless.
+    """
+    log = list(ChangeLog.objects.filter(id__gt=cursor).order_by('id').values_list('id', 'months', 'created_at'))
+    if not log:
+        return {'cursor': cursor, 'reload': False, 'months': {}}
+
+    latest = _committed_cursor(cursor, log)
+    oldest_kept = ChangeLog.objects.aggregate(oldest=Min('id'))['oldest']
+    if cursor < oldest_kept - 1 or any(months is None for _, months, _ in log):
+        return {'cursor': latest, 'reload': True, 'months': {}}
+
+    months = {date.fromisoformat(month) for _, changed, _ in log for month in changed}
+    seen_at = ChangeLog.objects.filter(id=cursor).values_list('created_at', flat=True).first() or log[0][2]
+    resend_after = seen_at - RESEND_OVERLAP
+
+    changed = {
+        month: {
+            'month': month.strftime('%Y-%m'),
+            'totals': as_json_totals(empty_totals()),
+            'entries': [],
+            'entry_ids': [],
+        }
+        for month in months
+    }
+    for summary in MonthlySummary.objects.filter(month__in=months):
+        changed[summary.month]['totals'] = as_json_totals(summary_totals(summary))
+    rows = MonthlyEntry.objects.filter(date__in=months).order_by('id').values_list('id', 'date', 'amount', 'updated_at')
+    for entry_id, month_date, amount, updated_at in rows:
+        changed[month_date]['entry_ids'].append(entry_id)
+        if updated_at >= resend_after:
+            changed[month_date]['entries'].append({'id': entry_id, 'amount': float(amount)})
+
+    return {
+        'cursor': latest,
+        'reload': False,
+        'months': {_month_key(month): data for month, data in sorted(changed.items())},
+    }
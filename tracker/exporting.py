@@ -0,0 +1,60 @@
+import csv
+import json
+from datetime import date
+from typing import Iterator, Optional
+
+from .aggregation import next_month
+from .importing import REQUIRED_COLUMNS
+from .models import MonthlyEntry
+
+
+# Same columns the importer reads, so an export can be imported again
+EXPORT_COLUMNS = (*REQUIRED_COLUMNS, 'notes')
+
+EXPORT_FIELDS = ('date', 'account__bank_name', 'account__account_name', 'account__account_type', 'amount', 'notes')
+
+# Rows fetched from the database cursor at a time
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    bank_name: Optional[str] = None,
+    account_type: Optional[str] = None,
+) -> Iterator[tuple]:
+    """Entry rows in EXPORT_COLUMNS order, streamed from a server-side cursor.
+
+    start and end are inclusive months; every filter is optional.
+    """
+    entries = MonthlyEntry.objects.order_by('date', 'account__bank_name', 'account__account_name')
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lt=next_month(end))
+    if bank_name:
+        entries = entries.filter(account__bank_name=bank_name)
+    if account_type:
+        entries = entries.filter(account__account_type=account_type)
+    return entries.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_csv(rows: Iterator[tuple]) -> Iterator[str]:
+    """CSV lines (header first) for export rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for entry_date, *values, amount, notes in rows:
+        yield writer.writerow([entry_date.isoformat(), *values, f"{amount:.2f}", notes])
+
+
+def iter_ndjson(rows: Iterator[tuple]) -> Iterator[str]:
+    """One JSON object per line for export rows (amounts as strings to keep them exact)"""
+    for entry_date, *values, amount, notes in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, [entry_date.isoformat(), *values, f"{amount:.2f}", notes]))) + '\n'
@@ -0,0 +1,169 @@
+import csv
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from django.db import transaction
+
+from .aggregation import ACCOUNT_TYPES, refresh_summaries
+from .caching import bump_all
+from .models import MonthlyEntry
+from .money import Money
+from .provisioning import BULK_BATCH_SIZE, get_or_create_accounts
+
+
+# Rows validated and written per transaction
+IMPORT_BATCH_SIZE = 5000
+
+# Only the first few bad rows are kept in the report
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ('date', 'bank_name', 'account_name', 'account_type', 'amount')
+
+
+class ImportFileError(ValueError):
+    """The import file can't be read at all (as opposed to individual bad rows)"""
+
+
+def _parse_date(value: str) -> date:
+    """First of the month for 'YYYY-MM-DD' or 'YYYY-MM' dates"""
+    value = value.strip()
+    for date_format in ('%Y-%m-%d', '%Y-%m'):
+        try:
+            return datetime.strptime(value, date_format).date().replace(day=1)
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date {value!r}")
+
+
+def _parse_row(row: Dict[str, str], line: int) -> Dict[str, Any]:
+    account_type = (row.get('account_type') or '').strip()
+    if account_type not in ACCOUNT_TYPES:
+        raise ValueError(f"unknown account type {account_type!r}")
+
+    bank_name = (row.get('bank_name') or '').strip()
+    account_name = (row.get('account_name') or '').strip()
+    if not bank_name or not account_name:
+        raise ValueError('bank_name and account_name are required')
+
+    amount = Money.parse(row.get('amount') or '')
+
+    return {
+        'date': _parse_date(row.get('date') or ''),
+        'bank_name': bank_name,
+        'account_name': account_name,
+        'account_type': account_type,
+        'amount': amount,
+        'notes': (row.get('notes') or '').strip(),
+        'line': line,
+    }
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _upsert_batch(rows: List[Dict[str, Any]], accounts: Dict[tuple, Any]) -> Tuple[int, List[Tuple[int, str]]]:
+    """Write one batch of parsed rows, returning the number of entries upserted and the rows rejected.
+
+    An account's type is fixed by the stored account, or for a new one by
+    its first row in the file; rows giving another type are rejected as
+    (line, error) pairs.
+    """
+    new_accounts: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row['bank_name'], row['account_name'])
+        if key not in accounts:
+            new_accounts.setdefault(key, row)
+    if new_accounts:
+        accounts.update(get_or_create_accounts(new_accounts.values()))
+
+    values = {}
+    rejected = []
+    for row in rows:
+        account = accounts[(row['bank_name'], row['account_name'])]
+        if account.account_type != row['account_type']:
+            rejected.append((
+                row['line'],
+                f"account type {row['account_type']!r} doesn't match {account.account_type!r}"
+                f" for {account.bank_name} - {account.account_name}",
+            ))
+            continue
+        # Later rows for the same month and account win
+        values[(row['date'], account.id)] = row
+
+    # INSERT ... ON CONFLICT (date, account) DO UPDATE
+    MonthlyEntry.objects.bulk_create(
+        [
+            MonthlyEntry(date=month_date, account_id=account_id, amount=row['amount'], notes=row['notes'])
+            for (month_date, account_id), row in values.items()
+        ],
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['date', 'account'],
+        update_fields=['amount', 'notes', 'updated_at'],
+    )
+    return len(values), rejected
+
+
+def import_entries(lines: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """Stream CSV lines (with a header row) into MonthlyEntry, upserting on month and account.
+
+    Columns: date, bank_name, account_name, account_type, amount and an
+    optional notes. Rows are read lazily and written in batches of
+    batch_size, each in its own transaction, so memory stays bounded by the
+    batch size; each batch refreshes its months' summaries in the same
+    transaction. Invalid rows, including amounts beyond money.MAX_PENCE and
+    rows whose account_type differs from the account's, are skipped and
+    reported. Returns a report with row counts, errors and throughput.
+    """
+    started = time.perf_counter()
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None or not set(REQUIRED_COLUMNS) <= {name.strip() for name in reader.fieldnames}:
+        raise ImportFileError(f"CSV header must include {', '.join(REQUIRED_COLUMNS)}")
+    reader.fieldnames = [name.strip() for name in reader.fieldnames]
+
+    report = {'rows': 0, 'upserted': 0, 'skipped': 0, 'errors': []}
+    accounts: Dict[tuple, Any] = {}
+    months = set()
+
+    def skip(line: int, error) -> None:
+        report['skipped'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append(f"line {line}: {error}")
+
+    def parsed_rows():
+        for row in reader:
+            report['rows'] += 1
+            try:
+                yield _parse_row(row, reader.line_num)
+            except ValueError as e:
+                skip(reader.line_num, e)
+
+    try:
+        for batch in _batches(parsed_rows(), batch_size):
+            batch_months = {row['date'] for row in batch}
+            # A batch's summaries commit with its entries, so a later failing batch leaves them consistent
+            with transaction.atomic():
+                upserted, rejected = _upsert_batch(batch, accounts)
+                refresh_summaries(batch_months)
+            report['upserted'] += upserted
+            for line, error in rejected:
+                skip(line, error)
+            months.update(batch_months)
+    finally:
+        if months:
+            # Imports can add accounts and months, not just change amounts
+            bump_all()
+
+    report['months'] = len(months)
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    report['rows_per_second'] = round(report['rows'] / report['seconds']) if report['seconds'] else report['rows']
+    return report
@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional['RequestMetrics']] = ContextVar('tracker_request_metrics', default=None)
+
+# Per-view aggregates for the metrics endpoint (this process only)
+_view_stats: Dict[str, Dict[str, Any]] = {}
+_view_stats_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL queries than its budget in TRACKER_QUERY_BUDGETS"""
+
+
+class RequestMetrics:
+    """Query count and time spent in the database and templates for one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, streaming: bool = False) -> str:
+        # A streaming body runs its queries after this is sent, so only the part before is measured
+        queries = f"{self.queries} queries (before streaming)" if streaming else f"{self.queries} queries"
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{queries}"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.elapsed() * 1000:.1f}',
+        ])
+
+
+def _count_query(execute, sql, params, many, context):
+    # Installed on every connection; only measures inside an instrumented request
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs) -> None:
+    """connection_created handler that adds the request query counter to a connection.
+
+    A handler per connection rather than a per-request execute_wrapper,
+    because async views run their queries on other threads (with other
+    connection objects); the current request's metrics follow them there
+    through a context variable.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+@contextmanager
+def template_timer():
+    """Add the time spent in the block to the current request's template time"""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.template_time += time.perf_counter() - started
+
+
+@contextmanager
+def untracked():
+    """Leave queries in the block out of the current request's metrics (work that isn't the request's own)"""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def _record(view_name: str, metrics: RequestMetrics, over_budget: bool) -> None:
+    elapsed = metrics.elapsed()
+    with _view_stats_lock:
+        stats = _view_stats.setdefault(view_name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0,
+            'template_ms': 0.0, 'total_ms': 0.0, 'max_total_ms': 0.0, 'over_budget': 0,
+        })
+        stats['requests'] += 1
+        stats['queries'] += metrics.queries
+        stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+        stats['db_ms'] += metrics.db_time * 1000
+        stats['template_ms'] += metrics.template_time * 1000
+        stats['total_ms'] += elapsed * 1000
+        stats['max_total_ms'] = max(stats['max_total_ms'], elapsed * 1000)
+        stats['over_budget'] += over_budget
+
+
+def view_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-view request counts, averages and maxima recorded by this process"""
+    with _view_stats_lock:
+        return {
+            view_name: {
+                'requests': stats['requests'],
+                'avg_queries': round(stats['queries'] / stats['requests'], 2),
+                'max_queries': stats['max_queries'],
+                'avg_db_ms': round(stats['db_ms'] / stats['requests'], 2),
+                'avg_template_ms': round(stats['template_ms'] / stats['requests'], 2),
+                'avg_total_ms': round(stats['total_ms'] / stats['requests'], 2),
+                'max_total_ms': round(stats['max_total_ms'], 2),
+                'over_budget': stats['over_budget'],
+                'budget': settings.TRACKER_QUERY_BUDGETS.get(view_name),
+            }
+            for view_name, stats in sorted(_view_stats.items())
+        }
+
+
+def reset_view_stats() -> None:
+    with _view_stats_lock:
+        _view_stats.clear()
+
+
+class InstrumentationMiddleware:
+    """Measure queries, DB time, template time and latency for every request.
+
+    Adds a Server-Timing header, feeds the /metrics/ endpoint and enforces
+    the per-view query budgets in TRACKER_QUERY_BUDGETS (keyed by URL name):
+    exceeding one is logged, or raises QueryBudgetExceeded when
+    TRACKER_QUERY_BUDGET_STRICT is set. Streaming responses only get a
+    Server-Timing header marked as partial, since their body is generated
+    after this returns. Works under both WSGI and ASGI. Place it first in
+    MIDDLEWARE so every query is counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _start(self):
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics)
+
+    def _finish(self, request, response, metrics: RequestMetrics):
+        response['Server-Timing'] = metrics.server_timing(streaming=response.streaming)
+        if response.streaming:
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.url_name if match and match.url_name else None
+        if view_name:
+            budget = settings.TRACKER_QUERY_BUDGETS.get(view_name)
+            over_budget = budget is not None and metrics.queries > budget
+            _record(view_name, metrics, over_budget)
+            if over_budget:
+                message = f"{view_name} ran {metrics.queries} queries (budget {budget}) for {request.path}"
+                if settings.TRACKER_QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+
+        return response
+
+    def process_template_response(self, request, response):
+        # Render here rather than in the handler so the time is attributed to templates
+        with template_timer():
+            response.render()
+        return response
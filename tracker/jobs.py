@@ -0,0 +1,230 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .instrumentation import untracked
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Job kinds and the functions that run them. A handler is called as
+# handler(progress, **job.params) and returns a JSON-serialisable result;
+# progress(done, total) records how far it has got.
+JOB_HANDLERS = {
+    'reset_data': 'tracker.maintenance.reset_data',
+    'add_accounts': 'tracker.maintenance.add_accounts_to_months',
+    'move_account': 'tracker.maintenance.move_account',
+    'delete_account': 'tracker.maintenance.delete_account',
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_resumed = False
+
+# Jobs handed to this process's pool and not yet run, so each is submitted once
+_submitted = set()
+_submitted_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TRACKER_JOB_WORKERS, thread_name_prefix='tracker-job'
+            )
+        return _executor
+
+
+def enqueue(kind: str, **params) -> Job:
+    """Queue a job and return it.
+
+    The job is handed to this process's worker pool once the surrounding
+    transaction commits, or run before returning when TRACKER_JOBS_EAGER is
+    set (as it is in the tests).
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"unknown job kind {kind!r}")
+    job = Job.objects.create(kind=kind, params=params)
+    if settings.TRACKER_JOBS_EAGER:
+        # Not counted against the request's query budget, as it wouldn't be from the pool
+        with untracked():
+            run_job(job.id)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: _submit(job.id))
+    return job
+
+
+def _submit(job_id: int) -> None:
+    """Hand the job to this process's pool, unless it is already waiting there"""
+    with _submitted_lock:
+        if job_id in _submitted:
+            return
+        _submitted.add(job_id)
+    _get_executor().submit(_run_in_thread, job_id)
+
+
+def _progress(job_id: int) -> Callable[[int, Optional[int]], None]:
+    def progress(done: int, total: Optional[int] = None) -> None:
+        fields: Dict[str, Any] = {'progress': done, 'heartbeat_at': timezone.now()}
+        if total is not None:
+            fields['total'] = total
+        Job.objects.filter(id=job_id).update(**fields)
+    return progress
+
+
+@contextmanager
+def _heartbeat(job_id: int):
+    """Touch the job's heartbeat every TRACKER_JOB_HEARTBEAT_SECONDS from a side thread while the block runs"""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.TRACKER_JOB_HEARTBEAT_SECONDS):
+                try:
+                    Job.objects.filter(id=job_id, status=Job.RUNNING).update(heartbeat_at=timezone.now())
+                except Exception:
+                    # e.g. SQLite's write lock held by the job itself for too long; try again next beat
+                    logger.warning('Could not record heartbeat of job %s', job_id, exc_info=True)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f"tracker-job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job_id: int) -> bool:
+    """Run a queued job in this thread, returning False if it was already claimed.
+
+    The claim is a single conditional UPDATE, so a job is never run twice
+    even when several processes pick up queued work. Handlers commit in
+    chunks of their own, so a job requeued after its process died carries
+    on from what is left; a failure is recorded on the job, not raised.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING, started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        return False
+
+    job = Job.objects.get(id=job_id)
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        if settings.TRACKER_JOBS_EAGER:
+            result = handler(_progress(job.id), **job.params)
+        else:
+            with _heartbeat(job.id):
+                result = handler(_progress(job.id), **job.params)
+    except Exception as e:
+        logger.exception('Job %s failed', job)
+        Job.objects.filter(id=job.id).update(status=Job.FAILED, error=str(e), finished_at=timezone.now())
+    else:
+        Job.objects.filter(id=job.id).update(status=Job.DONE, result=result, finished_at=timezone.now())
+    return True
+
+
+def _run_in_thread(job_id: int) -> None:
+    try:
+        run_job(job_id)
+    finally:
+        with _submitted_lock:
+            _submitted.discard(job_id)
+        # Pool threads outlive the job, so don't leave their connections open
+        connections.close_all()
+
+
+def requeue_stale_jobs() -> int:
+    """Queue running jobs whose heartbeat stopped (their process died) again, returning how many"""
+    stale_before = timezone.now() - timedelta(seconds=settings.TRACKER_JOB_STALE_SECONDS)
+    stale = Q(heartbeat_at__lt=stale_before) | Q(heartbeat_at__isnull=True, started_at__lt=stale_before)
+    requeued = Job.objects.filter(stale, status=Job.RUNNING).update(
+        status=Job.QUEUED, started_at=None, heartbeat_at=None
+    )
+    if requeued:
+        logger.warning('Requeued %s jobs that stopped running', requeued)
+    return requeued
+
+
+def resume_jobs() -> int:
+    """Requeue stale jobs and hand every queued one to this process's pool, returning how many were queued.
+
+    Jobs queued in a process that then stopped would otherwise wait for
+    `manage.py run_jobs`. Handing a job to several pools is harmless: only
+    one claim succeeds.
+    """
+    if settings.TRACKER_JOBS_EAGER:
+        return 0
+    requeue_stale_jobs()
+    job_ids = list(Job.objects.filter(status=Job.QUEUED).order_by('created_at').values_list('id', flat=True))
+    for job_id in job_ids:
+        _submit(job_id)
+    return len(job_ids)
+
+
+def resume_jobs_once(**kwargs) -> None:
+    """request_started handler: resume left-over jobs on a process's first request"""
+    global _resumed
+    with _executor_lock:
+        if _resumed:
+            return
+        _resumed = True
+    try:
+        resume_jobs()
+    except Exception:
+        # Never fail the request over it (e.g. before `migrate` has created the table)
+        logger.exception('Could not resume queued jobs')
+
+
+def revive_job(job: Job) -> Job:
+    """Requeue the job if its process died, and pick it up here if it is still waiting, as its status is polled"""
+    if settings.TRACKER_JOBS_EAGER or job.status not in (Job.QUEUED, Job.RUNNING):
+        return job
+    stale_before = timezone.now() - timedelta(seconds=settings.TRACKER_JOB_STALE_SECONDS)
+    if job.status == Job.RUNNING and job.heartbeat_at and job.heartbeat_at < stale_before:
+        requeue_stale_jobs()
+        job.refresh_from_db()
+    if job.status == Job.QUEUED and job.created_at < stale_before:
+        _submit(job.id)
+    return job
+
+
+def run_queued_jobs() -> int:
+    """Run every queued job in this thread, oldest first, returning how many ran.
+
+    Running jobs whose heartbeat stopped are queued again first.
+    """
+    requeue_stale_jobs()
+    job_ids = list(Job.objects.filter(status=Job.QUEUED).order_by('created_at').values_list('id', flat=True))
+    return sum(run_job(job_id) for job_id in job_ids)
+
+
+def job_status(job: Job) -> Dict[str, Any]:
+    """JSON state of a job, as polled by the UI"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'result': job.result,
+        'error': job.error,
+        'url': reverse('job_status', args=[job.id]),
+    }
@@ -0,0 +1,113 @@
+from datetime import date
+from typing import Any, Callable, Dict, Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from .aggregation import as_json_totals, rebuild_summaries, refresh_summaries, stored_month_totals
+from .caching import bump_all
+from .models import Account, MonthlyEntry
+from .provisioning import MONTHS_PER_TRANSACTION, add_accounts, generate_year_data
+
+
+# Entries deleted per transaction, so a long job lets other writers in between chunks
+DELETE_CHUNK_SIZE = 2000
+
+Progress = Callable[..., None]
+
+
+def move_entries(entries, target: Account) -> Dict[date, MonthlyEntry]:
+    """Move entries onto target within the caller's transaction.
+
+    One entry per account per month: where the target already has one,
+    the moved amount is folded into it instead. Returns those target
+    entries, keyed by month.
+    """
+    months = set(entries.dates('date', 'month'))
+    merged = {target_entry.date: target_entry for target_entry in target.entries.filter(date__in=months)}
+    now = timezone.now()
+    if merged:
+        for month_date, amount in entries.filter(date__in=merged).values_list('date', 'amount'):
+            merged[month_date].amount += amount
+            merged[month_date].updated_at = now
+        MonthlyEntry.objects.bulk_update(merged.values(), ['amount', 'updated_at'])
+        entries.filter(date__in=merged).delete()
+    entries.update(account=target, updated_at=now)
+    return merged
+
+
+def _delete_in_chunks(entries, progress: Progress, refresh: bool) -> int:
+    """Delete the entries DELETE_CHUNK_SIZE at a time, oldest first, optionally refreshing their months"""
+    total = entries.count()
+    done = 0
+    progress(done, total)
+    while True:
+        with transaction.atomic():
+            chunk = list(entries.order_by('date', 'id').values_list('id', 'date')[:DELETE_CHUNK_SIZE])
+            if not chunk:
+                break
+            MonthlyEntry.objects.filter(id__in=[entry_id for entry_id, _ in chunk]).delete()
+            if refresh:
+                refresh_summaries({month_date for _, month_date in chunk})
+        done += len(chunk)
+        progress(done, total)
+    return done
+
+
+def reset_data(progress: Progress) -> Dict[str, Any]:
+    """Delete every entry and account, then provision DEFAULT_YEAR from BASE_ACCOUNTS again"""
+    deleted = _delete_in_chunks(MonthlyEntry.objects.all(), progress, refresh=False)
+    with transaction.atomic():
+        Account.objects.all().delete()
+    months = generate_year_data()
+    rebuild_summaries()
+    return {'deleted': deleted, 'months': len(months)}
+
+
+def add_accounts_to_months(progress: Progress, accounts: Iterable[Dict]) -> Dict[str, Any]:
+    """Add accounts to every stored month (see provisioning.add_accounts)"""
+    return {'created': add_accounts(accounts, progress)}
+
+
+def move_account(progress: Progress, account_id: int, target_id: int, month: str) -> Dict[str, Any]:
+    """Move all of an account's entries onto another account, a batch of months per transaction.
+
+    The result names the target entry for `month` (YYYY-MM-DD), the one
+    the user was editing.
+    """
+    account = Account.objects.get(id=account_id)
+    target = Account.objects.get(id=target_id)
+    months = sorted(account.entries.dates('date', 'month'))
+
+    progress(0, len(months))
+    for start in range(0, len(months), MONTHS_PER_TRANSACTION):
+        chunk = months[start:start + MONTHS_PER_TRANSACTION]
+        with transaction.atomic():
+            move_entries(account.entries.filter(date__in=chunk), target)
+            if target.account_type != account.account_type:
+                refresh_summaries(chunk)
+            # Account names are shown in every month's cached groups
+            bump_all()
+        progress(start + len(chunk), len(months))
+
+    with transaction.atomic():
+        if not account.entries.exists():
+            account.delete()
+
+    entry = target.entries.filter(date=date.fromisoformat(month)).first()
+    return {
+        'id': entry.id if entry else None,
+        'bank_name': target.bank_name,
+        'account_name': target.account_name,
+    }
+
+
+def delete_account(progress: Progress, account_id: int, month: str) -> Dict[str, Any]:
+    """Delete an account's entries in chunks, refreshing each chunk's months, then the account.
+
+    The result carries the refreshed totals for `month` (YYYY-MM-DD).
+    """
+    deleted = _delete_in_chunks(MonthlyEntry.objects.filter(account_id=account_id), progress, refresh=True)
+    with transaction.atomic():
+        Account.objects.filter(id=account_id).delete()
+    return {'deleted': deleted, 'totals': as_json_totals(stored_month_totals(date.fromisoformat(month)))}
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tracker.assets import TRACKER_SCRIPTS, build_bundle
+
+
+class Command(BaseCommand):
+    help = 'Bundle the tracker JS into one file (minified if rjsmin is installed); run before collectstatic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-minify', action='store_true', help='Concatenate without minifying')
+
+    def handle(self, *args, **options):
+        bundle = build_bundle(minify=not options['no_minify'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {bundle} ({len(TRACKER_SCRIPTS)} scripts, {bundle.stat().st_size} bytes)"
+        ))
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.importing import IMPORT_BATCH_SIZE, ImportFileError, import_entries
+
+
+class Command(BaseCommand):
+    help = 'Import monthly balances from a CSV export, updating entries that already exist (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with date, bank_name, account_name, account_type, amount[, notes] ('-' for stdin)")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                report = import_entries(sys.stdin, options['batch_size'])
+            else:
+                with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                    report = import_entries(f, options['batch_size'])
+        except (OSError, ImportFileError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} rows ({report['upserted']} entries upserted, "
+            f"{report['skipped']} skipped) across {report['months']} months in {report['seconds']}s "
+            f"({report['rows_per_second']} rows/s)"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.provisioning import DEFAULT_YEAR, generate_year_data, provision_years
+
+
+class Command(BaseCommand):
+    help = 'Create entries for every month of a year (or range of years) that has none (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=DEFAULT_YEAR, help='Year to provision')
+        parser.add_argument(
+            '--end-year', type=int,
+            help='Backfill every year from --year to this one, copying each month forward from the last'
+        )
+
+    def handle(self, *args, **options):
+        year, end_year = options['year'], options['end_year']
+        if end_year is None:
+            months = generate_year_data(year)
+        else:
+            try:
+                months = provision_years(year, end_year)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        if months:
+            self.stdout.write(self.style.SUCCESS(
+                f"Provisioned {len(months)} months ({months[0]:%Y-%m} to {months[-1]:%Y-%m})"
+            ))
+        else:
+            self.stdout.write('All months already exist')
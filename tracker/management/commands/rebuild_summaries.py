@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tracker.aggregation import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the MonthlySummary rollup table from MonthlyEntry'
+
+    def handle(self, *args, **options):
+        months = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {months} months"))
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tracker.benchmarks import benchmark_report
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the views and helpers on a synthetic dataset in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=50, help='Accounts in the generated dataset')
+        parser.add_argument('--years', type=int, default=30, help='Years of monthly entries per account')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the dataset')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        # Never touch the real database: run against a fresh test database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            report = benchmark_report(
+                accounts=options['accounts'],
+                years=options['years'],
+                repeat=options['repeat'],
+                seed=options['seed'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from tracker.jobs import run_queued_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs in this process (e.g. ones left behind by a restarted server)'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"Ran {run_queued_jobs()} jobs"))
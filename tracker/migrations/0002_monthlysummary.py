@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:29
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """Build a summary row for every month already stored"""
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+    MonthlySummary = apps.get_model('tracker', 'MonthlySummary')
+
+    summaries = {}
+    for entry_date, account_type, amount in MonthlyEntry.objects.values_list('date', 'account_type', 'amount').iterator():
+        month = entry_date.replace(day=1)
+        summary = summaries.setdefault(month, MonthlySummary(month=month))
+        field = f"{account_type.lower().replace(' ', '_')}_total"
+        setattr(summary, field, Decimal(getattr(summary, field)) + amount)
+        if account_type == 'Credit Cards':
+            summary.grand_total = Decimal(summary.grand_total) - amount
+        else:
+            summary.grand_total = Decimal(summary.grand_total) + amount
+
+    MonthlySummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('current_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('savings_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('lending_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('deposits_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pensions_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('credit_cards_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('grand_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'monthly summaries',
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:35
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def rebuild_summaries(apps):
+    """Recompute every MonthlySummary row from the entries and their accounts' types"""
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+    MonthlySummary = apps.get_model('tracker', 'MonthlySummary')
+
+    summaries = {}
+    rows = MonthlyEntry.objects.values_list('date', 'account__account_type', 'amount')
+    for entry_date, account_type, amount in rows.iterator():
+        month = entry_date.replace(day=1)
+        summary = summaries.setdefault(month, MonthlySummary(month=month))
+        field = f"{account_type.lower().replace(' ', '_')}_total"
+        setattr(summary, field, Decimal(getattr(summary, field)) + amount)
+        if account_type == 'Credit Cards':
+            summary.grand_total = Decimal(summary.grand_total) - amount
+        else:
+            summary.grand_total = Decimal(summary.grand_total) + amount
+
+    MonthlySummary.objects.all().delete()
+    MonthlySummary.objects.bulk_create(summaries.values())
+
+
+def populate_accounts(apps, schema_editor):
+    """Create one Account per (bank_name, account_name) and point every entry at it.
+
+    An account whose entries had different types in different months takes
+    its most recent type; the month summaries are then rebuilt so earlier
+    months count it under that type too.
+    """
+    Account = apps.get_model('tracker', 'Account')
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+
+    # Newest entries first, so each account keeps its most recent type
+    account_types = {}
+    retyped = False
+    rows = MonthlyEntry.objects.order_by('-date', '-id').values_list('bank_name', 'account_name', 'account_type')
+    for bank_name, account_name, account_type in rows.iterator():
+        retyped |= account_types.setdefault((bank_name, account_name), account_type) != account_type
+
+    Account.objects.bulk_create([
+        Account(bank_name=bank_name, account_name=account_name, account_type=account_type)
+        for (bank_name, account_name), account_type in account_types.items()
+    ])
+    for account in Account.objects.all():
+        MonthlyEntry.objects.filter(
+            bank_name=account.bank_name,
+            account_name=account.account_name
+        ).update(account=account)
+
+    if retyped:
+        rebuild_summaries(apps)
+
+
+def restore_entry_accounts(apps, schema_editor):
+    """Copy each account's names and type back onto its entries"""
+    Account = apps.get_model('tracker', 'Account')
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+    for account in Account.objects.all():
+        MonthlyEntry.objects.filter(account=account).update(
+            bank_name=account.bank_name,
+            account_name=account.account_name,
+            account_type=account.account_type,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_monthlysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_name', models.CharField(max_length=100)),
+                ('account_name', models.CharField(max_length=100)),
+                ('account_type', models.CharField(choices=[('Current', 'Current'), ('Savings', 'Savings'), ('Lending', 'Lending'), ('Deposits', 'Deposits'), ('Pensions', 'Pensions'), ('Credit Cards', 'Credit Cards')], max_length=50)),
+            ],
+            options={
+                'ordering': ['bank_name', 'account_name'],
+                'constraints': [models.UniqueConstraint(fields=('bank_name', 'account_name'), name='unique_bank_account')],
+            },
+        ),
+        migrations.AddField(
+            model_name='monthlyentry',
+            name='account',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='tracker.account'),
+        ),
+        migrations.RunPython(populate_accounts, restore_entry_accounts),
+        migrations.AlterModelOptions(
+            name='monthlyentry',
+            options={'ordering': ['-date', 'account__bank_name', 'account__account_name']},
+        ),
+        migrations.RemoveIndex(
+            model_name='monthlyentry',
+            name='tracker_mon_date_aa4310_idx',
+        ),
+        migrations.RemoveField(
+            model_name='monthlyentry',
+            name='bank_name',
+        ),
+        migrations.RemoveField(
+            model_name='monthlyentry',
+            name='account_name',
+        ),
+        migrations.RemoveField(
+            model_name='monthlyentry',
+            name='account_type',
+        ),
+        migrations.AlterField(
+            model_name='monthlyentry',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='tracker.account'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlyentry',
+            index=models.Index(fields=['date', 'account'], name='tracker_mon_date_9c260c_idx'),
+        ),
+    ]
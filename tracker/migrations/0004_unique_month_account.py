@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def dedupe_entries(apps, schema_editor):
+    """Move entries to the first of their month and keep one entry per account per month.
+
+    Of several entries for the same account and month the newest (highest
+    id) wins. Month summaries are rebuilt if anything changed.
+    """
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+    MonthlySummary = apps.get_model('tracker', 'MonthlySummary')
+
+    changed = False
+    for entry in MonthlyEntry.objects.exclude(date__day=1).iterator():
+        entry.date = entry.date.replace(day=1)
+        entry.save(update_fields=['date'])
+        changed = True
+
+    seen = set()
+    duplicate_ids = []
+    for entry_id, entry_date, account_id in MonthlyEntry.objects.order_by('-id').values_list('id', 'date', 'account_id').iterator():
+        if (entry_date, account_id) in seen:
+            duplicate_ids.append(entry_id)
+        else:
+            seen.add((entry_date, account_id))
+    for start in range(0, len(duplicate_ids), 500):
+        MonthlyEntry.objects.filter(id__in=duplicate_ids[start:start + 500]).delete()
+        changed = True
+
+    if not changed:
+        return
+
+    summaries = {}
+    rows = MonthlyEntry.objects.values_list('date', 'account__account_type', 'amount')
+    for month, account_type, amount in rows.iterator():
+        summary = summaries.setdefault(month, MonthlySummary(month=month))
+        field = f"{account_type.lower().replace(' ', '_')}_total"
+        setattr(summary, field, Decimal(getattr(summary, field)) + amount)
+        if account_type == 'Credit Cards':
+            summary.grand_total = Decimal(summary.grand_total) - amount
+        else:
+            summary.grand_total = Decimal(summary.grand_total) + amount
+
+    MonthlySummary.objects.all().delete()
+    MonthlySummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_account'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_entries, migrations.RunPython.noop),
+        # The unique constraint's index covers (date, account) lookups
+        migrations.RemoveIndex(
+            model_name='monthlyentry',
+            name='tracker_mon_date_9c260c_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyentry',
+            constraint=models.UniqueConstraint(fields=('date', 'account'), name='unique_month_account'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_unique_month_account'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='monthlyentry',
+            name='account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='tracker.account'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['account_type'], name='account_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlyentry',
+            index=models.Index(fields=['date', 'account', 'amount'], name='entry_month_totals_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlyentry',
+            index=models.Index(fields=['account', 'date'], name='entry_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+import tracker.money
+
+
+SUMMARY_FIELDS = [
+    'current_total', 'savings_total', 'lending_total', 'deposits_total', 'pensions_total', 'credit_cards_total',
+    'grand_total',
+]
+
+# Pounds are scaled to pence in place, so they need room for two more digits first
+WIDE_DECIMAL = {'max_digits': 20, 'decimal_places': 2}
+
+
+def _scale(apps, factor):
+    MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+    MonthlySummary = apps.get_model('tracker', 'MonthlySummary')
+    # Round() snaps the REAL arithmetic SQLite does on decimals to whole pence
+    MonthlyEntry.objects.update(amount=Round(F('amount') * factor, 2))
+    MonthlySummary.objects.update(**{field: Round(F(field) * factor, 2) for field in SUMMARY_FIELDS})
+
+
+def pounds_to_pence(apps, schema_editor):
+    _scale(apps, 100)
+
+
+def pence_to_pounds(apps, schema_editor):
+    _scale(apps, Decimal('0.01'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_change_feed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='monthlyentry',
+            name='amount',
+            field=models.DecimalField(**WIDE_DECIMAL),
+        ),
+        *[
+            migrations.AlterField(
+                model_name='monthlysummary',
+                name=field,
+                field=models.DecimalField(default=0, **WIDE_DECIMAL),
+            )
+            for field in SUMMARY_FIELDS
+        ],
+        migrations.RunPython(pounds_to_pence, pence_to_pounds),
+        migrations.AlterField(
+            model_name='monthlyentry',
+            name='amount',
+            field=tracker.money.MoneyField(),
+        ),
+        *[
+            migrations.AlterField(
+                model_name='monthlysummary',
+                name=field,
+                field=tracker.money.MoneyField(default=0),
+            )
+            for field in SUMMARY_FIELDS
+        ],
+    ]
@@ -1,6 +1,10 @@
+from datetime import date
+
 from django.db import models
 
-class MonthlyEntry(models.Model):
+from .money import MoneyField
+
+class Account(models.Model):
     ACCOUNT_TYPE_CHOICES = [
         ('Current', 'Current'),
         ('Savings', 'Savings'),
@@ -9,19 +13,134 @@ class MonthlyEntry(models.Model):
         ('Pensions', 'Pensions'),
         ('Credit Cards', 'Credit Cards'),
     ]
-    
-    date = models.DateField()
+
     bank_name = models.CharField(max_length=100)
     account_name = models.CharField(max_length=100)
     account_type = models.CharField(max_length=50, choices=ACCOUNT_TYPE_CHOICES)
-    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bank_name', 'account_name'], name='unique_bank_account'),
+        ]
+        indexes = [
+            models.Index(fields=['account_type'], name='account_type_idx'),
+        ]
+        ordering = ['bank_name', 'account_name']
+
+    def __str__(self):
+        return f"{self.bank_name} - {self.account_name}"
+
+
+class MonthlyEntry(models.Model):
+    ACCOUNT_TYPE_CHOICES = Account.ACCOUNT_TYPE_CHOICES
+    
+    date = models.DateField()
+    # Indexed by the (account, date) index below rather than on its own
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='entries', db_index=False)
+    # Whole pence, loaded as Money
+    amount = MoneyField()
     notes = models.TextField(blank=True)
+    # Set by every write path (bulk ones included), so the change feed can send only edited rows
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # One entry per account per month (dates are stored as the first of the month)
+            models.UniqueConstraint(fields=['date', 'account'], name='unique_month_account'),
+        ]
+        indexes = [
+            # Covers month-range totals: the join and the sum never touch the table
+            models.Index(fields=['date', 'account', 'amount'], name='entry_month_totals_idx'),
+            # An account's entries across months (renames, moves, deletes)
+            models.Index(fields=['account', 'date'], name='entry_account_date_idx'),
+        ]
+        ordering = ['-date', 'account__bank_name', 'account__account_name']
+
+    # Account details live on the Account row; these keep entry.bank_name etc. working
+    @property
+    def bank_name(self):
+        return self.account.bank_name
+
+    @property
+    def account_name(self):
+        return self.account.account_name
+
+    @property
+    def account_type(self):
+        return self.account.account_type
+
+    def save(self, *args, **kwargs):
+        # Entries belong to a month, stored as its first day
+        if isinstance(self.date, date):
+            self.date = self.date.replace(day=1)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.bank_name} - {self.account_name} ({self.date.strftime('%Y-%m')}): {self.amount}"
+
+
+class MonthlySummary(models.Model):
+    """Per-month rollup of MonthlyEntry totals (in pence, like the entries), maintained on write"""
+    month = models.DateField(unique=True)
+    current_total = MoneyField(default=0)
+    savings_total = MoneyField(default=0)
+    lending_total = MoneyField(default=0)
+    deposits_total = MoneyField(default=0)
+    pensions_total = MoneyField(default=0)
+    credit_cards_total = MoneyField(default=0)
+    grand_total = MoneyField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-month']
+        verbose_name_plural = 'monthly summaries'
+
+    def __str__(self):
+        return f"{self.month.strftime('%Y-%m')}: {self.grand_total}"
+
+
+class ChangeLog(models.Model):
+    """One write, for the change feed: its id is the feed cursor (see tracker.changes)"""
+    # First-of-month dates as 'YYYY-MM-DD'; null when every month may have changed
+    months = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.pk}: {', '.join(self.months) if self.months is not None else 'all months'}"
+
+
+class Job(models.Model):
+    """A maintenance operation queued to run in the background (see tracker.jobs)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched while the job runs; a running job that stops touching it is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
+        ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['date', 'bank_name', 'account_name']),
+            # Picking up queued jobs, oldest first
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
         ]
-        ordering = ['-date', 'bank_name', 'account_name']
 
     def __str__(self):
-        return f"{self.bank_name} - {self.account_name} ({self.date.strftime('%Y-%m')}): {self.amount}"
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,167 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import total_ordering
+from typing import Iterable
+
+from django import forms
+from django.db import models
+
+
+PENNY = Decimal('0.01')
+
+# Largest amount accepted, in pence (£10 trillion): far inside BIGINT, so
+# totals over any realistic number of entries can't overflow either
+MAX_PENCE = 10 ** 15
+
+
+@total_ordering
+class Money:
+    """An exact amount in pence (the currency's minor unit).
+
+    Entry amounts and summary totals are stored and summed as integers and
+    loaded as Money, so arithmetic never goes through floats or decimal
+    contexts. Money adds and subtracts with Money (and 0, for sum()), and
+    compares with Money or with numbers read as pounds. str() and format()
+    give pounds, e.g. '-12.50'; float() is for the JSON boundary only.
+    """
+    __slots__ = ('pence',)
+
+    def __init__(self, pence: int = 0):
+        self.pence = int(pence)
+
+    @classmethod
+    def parse(cls, value) -> 'Money':
+        """Money from pounds given as a Money, str, int, float or Decimal (rounded half up to the penny).
+
+        Raises ValueError for anything that isn't an amount or is beyond MAX_PENCE.
+        """
+        if isinstance(value, Money):
+            return value
+        try:
+            pounds = Decimal(str(value).strip().replace(',', ''))
+            pence = int((pounds * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        except (InvalidOperation, ValueError):
+            raise ValueError(f"invalid amount {value!r}")
+        if abs(pence) > MAX_PENCE:
+            raise ValueError(f"amount {value!r} is out of range")
+        return cls(pence)
+
+    @staticmethod
+    def sum(amounts: Iterable['Money']) -> 'Money':
+        """Total of many amounts as one integer sum"""
+        return Money(sum(amount.pence for amount in amounts))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.pence).scaleb(-2)
+
+    def _other_pence(self, other):
+        if isinstance(other, Money):
+            return other.pence
+        if other == 0:
+            return 0
+        return NotImplemented
+
+    def __add__(self, other):
+        pence = self._other_pence(other)
+        return pence if pence is NotImplemented else Money(self.pence + pence)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        pence = self._other_pence(other)
+        return pence if pence is NotImplemented else Money(self.pence - pence)
+
+    def __rsub__(self, other):
+        pence = self._other_pence(other)
+        return pence if pence is NotImplemented else Money(pence - self.pence)
+
+    def __neg__(self):
+        return Money(-self.pence)
+
+    def __abs__(self):
+        return Money(abs(self.pence))
+
+    def __truediv__(self, other):
+        """Money / Money is a Decimal ratio; Money / number is Money, rounded half up"""
+        if isinstance(other, Money):
+            return Decimal(self.pence) / Decimal(other.pence)
+        if isinstance(other, (int, Decimal)):
+            return Money(int((Decimal(self.pence) / other).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+        return NotImplemented
+
+    def _compare_key(self, other):
+        if isinstance(other, Money):
+            return self.pence, other.pence
+        if isinstance(other, (int, float, Decimal)):
+            return self.to_decimal(), other
+        return None
+
+    def __eq__(self, other):
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] == key[1]
+
+    def __lt__(self, other):
+        key = self._compare_key(other)
+        return NotImplemented if key is None else key[0] < key[1]
+
+    def __hash__(self):
+        # Equal to the same amount as a Decimal, so hash like one
+        return hash(self.to_decimal())
+
+    def __bool__(self):
+        return self.pence != 0
+
+    def __float__(self):
+        return self.pence / 100
+
+    def __str__(self):
+        return f"{self.to_decimal():.2f}"
+
+    def __format__(self, format_spec):
+        return format(self.to_decimal(), format_spec or '.2f')
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+class MoneyField(models.BigIntegerField):
+    """Money stored as a whole number of pence.
+
+    Accepts Money or pounds as a Decimal or str wherever a value goes to
+    the database, including filters and bulk writes, and loads Money. A
+    bare int could mean pounds or pence, so 0 is the only one accepted;
+    floats are refused too. SUM() over the column is a plain integer sum,
+    converted back to Money.
+    """
+    description = 'Amount of money in pence'
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else Money(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Money):
+            return value
+        try:
+            return Money.parse(value)
+        except ValueError:
+            raise forms.ValidationError(f"“{value}” is not a valid amount.", code='invalid')
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        if isinstance(value, float) or (isinstance(value, int) and value != 0):
+            raise TypeError(f"{self.name} takes Money, a Decimal or a str of pounds, not {value!r}")
+        return Money.parse(value).pence
+
+    @property
+    def validators(self):
+        # The integer range checks would compare pounds with pence
+        return [*self.default_validators, *self._validators]
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return '' if value is None else str(value)
+
+    def formfield(self, **kwargs):
+        # Edited in pounds
+        return models.Field.formfield(self, **{'form_class': forms.DecimalField, 'decimal_places': 2, **kwargs})
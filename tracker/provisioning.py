@@ -0,0 +1,232 @@
+from bisect import bisect_left
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .aggregation import next_month, refresh_summaries
+from .caching import bump_all
+from .models import Account, MonthlyEntry
+
+
+# Constants
+BASE_ACCOUNTS = [
+    {'bank': 'Barclays', 'account': 'Main Account', 'type': 'Current', 'amount': 0},
+    {'bank': 'Barclays', 'account': 'Joint Account', 'type': 'Current', 'amount': 0},
+    {'bank': 'Lloyds', 'account': 'Credit Card', 'type': 'Current', 'amount': 0},
+    {'bank': 'HSBC', 'account': 'Flex Account', 'type': 'Current', 'amount': 0},
+    {'bank': 'Barclays', 'account': 'Rainy Day', 'type': 'Savings', 'amount': 0},
+    {'bank': 'Barclays', 'account': 'ISA', 'type': 'Savings', 'amount': 0},
+    {'bank': 'Lloyds', 'account': 'Easy Saver', 'type': 'Savings', 'amount': 0},
+    {'bank': 'Family', 'account': 'Personal Loan', 'type': 'Lending', 'amount': 0},
+    {'bank': 'Deanston Building', 'account': 'Deposit till Apr 26', 'type': 'Deposits', 'amount': 0},
+    {'bank': 'RetireReady', 'account': 'Pension Fund', 'type': 'Pensions', 'amount': 0},
+    {'bank': 'Lloyds Cashback', 'account': 'Credit Card', 'type': 'Credit Cards', 'amount': 0},
+    {'bank': 'Barclaycard', 'account': 'Credit Card', 'type': 'Credit Cards', 'amount': 0},
+]
+
+DEFAULT_YEAR = getattr(settings, 'TRACKER_DEFAULT_YEAR', 2025)
+
+# Rows per INSERT statement when provisioning months
+BULK_BATCH_SIZE = 1000
+
+# Months written per transaction when adding accounts across the history
+MONTHS_PER_TRANSACTION = 24
+
+
+def get_or_create_accounts(accounts: Iterable[Dict]) -> Dict[tuple, Account]:
+    """Account rows for dicts of bank_name, account_name, account_type, keyed by (bank_name, account_name).
+
+    One query for the accounts that already exist and one bulk insert for
+    the rest; existing accounts keep their stored type.
+    """
+    accounts = {(a['bank_name'], a['account_name']): a['account_type'] for a in accounts}
+    if not accounts:
+        return {}
+
+    def fetch():
+        return {
+            (account.bank_name, account.account_name): account
+            for account in Account.objects.filter(
+                bank_name__in={bank_name for bank_name, _ in accounts},
+                account_name__in={account_name for _, account_name in accounts}
+            )
+            if (account.bank_name, account.account_name) in accounts
+        }
+
+    found = fetch()
+    missing = [
+        Account(bank_name=bank_name, account_name=account_name, account_type=account_type)
+        for (bank_name, account_name), account_type in accounts.items()
+        if (bank_name, account_name) not in found
+    ]
+    if missing:
+        Account.objects.bulk_create(missing, ignore_conflicts=True)
+        found = fetch()
+    return found
+
+
+def _base_rows() -> List[Dict]:
+    accounts = get_or_create_accounts(
+        {'bank_name': account['bank'], 'account_name': account['account'], 'account_type': account['type']}
+        for account in BASE_ACCOUNTS
+    )
+    return [
+        {'account_id': accounts[(account['bank'], account['account'])].id, 'amount': account['amount']}
+        for account in BASE_ACCOUNTS
+    ]
+
+
+def _entry_rows(entries) -> List[Dict]:
+    return [{'account_id': entry.account_id, 'amount': entry.amount} for entry in entries]
+
+
+def _month_rows(month_date: date) -> List[Dict]:
+    """Template rows copied from the entries of one stored month"""
+    return list(
+        MonthlyEntry.objects.filter(date__gte=month_date.replace(day=1), date__lt=next_month(month_date))
+        .order_by('account__bank_name', 'account__account_name')
+        .values('account_id', 'amount')
+    )
+
+
+def _build_entries(month_date: date, rows: Iterable[Dict]) -> List[MonthlyEntry]:
+    return [MonthlyEntry(date=month_date, notes="", **row) for row in rows]
+
+
+def create_entries_for_month(month_date: date, template_entries=None) -> None:
+    """Create entries for a specific month based on template or BASE_ACCOUNTS"""
+    rows = _entry_rows(template_entries) if template_entries else _base_rows()
+    MonthlyEntry.objects.bulk_create(
+        _build_entries(month_date.replace(day=1), rows), batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def missing_months(year: int = DEFAULT_YEAR, end_year: Optional[int] = None) -> List[date]:
+    """Months of the specified year (or year range) that have no entries, found with a single query"""
+    end_year = year if end_year is None else end_year
+    existing = set(
+        MonthlyEntry.objects.filter(date__gte=date(year, 1, 1), date__lt=date(end_year + 1, 1, 1))
+        .dates('date', 'month')
+    )
+    return [
+        date(y, month, 1)
+        for y in range(year, end_year + 1)
+        for month in range(1, 13)
+        if date(y, month, 1) not in existing
+    ]
+
+
+def fill_months(months: Iterable[date], copy_forward: bool = True) -> List[date]:
+    """Bulk-create entries for months that currently have none.
+
+    With copy_forward each month copies the accounts and amounts of the most
+    recent earlier month (stored or just created), falling back to
+    BASE_ACCOUNTS; otherwise every month starts from BASE_ACCOUNTS. Templates
+    are only loaded for stored months that sit right before a gap, so the
+    work stays linear in the number of rows created.
+    """
+    months = sorted({month.replace(day=1) for month in months})
+    if not months:
+        return []
+
+    existing = (
+        list(MonthlyEntry.objects.filter(date__lt=months[-1]).dates('date', 'month'))
+        if copy_forward else []
+    )
+    template_month: Optional[date] = None
+    template_rows: Optional[List[Dict]] = None
+    new_entries: List[MonthlyEntry] = []
+
+    for month_date in months:
+        if copy_forward:
+            # Most recent stored month before this one
+            index = bisect_left(existing, month_date)
+            previous = existing[index - 1] if index else None
+            if previous is not None and (template_month is None or previous > template_month):
+                template_month, template_rows = previous, _month_rows(previous)
+        if template_rows is None:
+            template_rows = _base_rows()
+        new_entries.extend(_build_entries(month_date, template_rows))
+        template_month = month_date
+
+    with transaction.atomic():
+        # A concurrent provisioner may have filled some of these months already
+        MonthlyEntry.objects.bulk_create(new_entries, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        refresh_summaries(months)
+        # New months change the month lists, not just the months themselves
+        bump_all()
+
+    return months
+
+
+# Data management functions
+def generate_year_data(year: int = DEFAULT_YEAR) -> List[date]:
+    """Generate data for all months of specified year that don't exist yet.
+
+    Idempotent: months that already have entries are left alone, and the
+    months that were created are returned.
+    """
+    months = missing_months(year)
+    # No data for the year at all: start every month from BASE_ACCOUNTS,
+    # otherwise fill the gaps from the previous months
+    return fill_months(months, copy_forward=len(months) < 12)
+
+
+def provision_years(start_year: int, end_year: int) -> List[date]:
+    """Backfill every missing month from start_year to end_year inclusive.
+
+    Gaps are filled by copying forward the most recent earlier month, in one
+    transaction, so a multi-decade backfill is a handful of queries plus
+    batched INSERTs.
+    """
+    if end_year < start_year:
+        raise ValueError('end_year must not be before start_year')
+    return fill_months(missing_months(start_year, end_year))
+
+
+def ensure_all_months_exist(year: int = DEFAULT_YEAR) -> None:
+    """Make sure all months of the specified year have data"""
+    fill_months(missing_months(year))
+
+
+def copy_from_previous_month(target_date: date) -> None:
+    """Copy entries from the most recent previous month to the target month"""
+    fill_months([target_date])
+
+
+def add_accounts(accounts: Iterable[Dict], progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Add accounts (dicts of bank_name, account_name, account_type) to every stored month.
+
+    Set-based: one query for the months, then INSERT ... ON CONFLICT DO
+    NOTHING, so months that already hold an account are skipped by the
+    unique constraint rather than a pre-check. Months are written
+    MONTHS_PER_TRANSACTION at a time, each batch in its own transaction,
+    reporting progress(months_done, months) after each. New entries start at
+    zero, so the month summaries are unchanged. Returns the number of
+    entries created.
+    """
+    with transaction.atomic():
+        account_ids = [account.id for account in get_or_create_accounts(accounts).values()]
+    if not account_ids:
+        return 0
+
+    account_entries = MonthlyEntry.objects.filter(account_id__in=account_ids)
+    existing = account_entries.count()
+    months = list(MonthlyEntry.objects.dates('date', 'month'))
+    for start in range(0, len(months), MONTHS_PER_TRANSACTION):
+        with transaction.atomic():
+            MonthlyEntry.objects.bulk_create(
+                [
+                    MonthlyEntry(date=month_date, account_id=account_id, amount=0, notes="")
+                    for month_date in months[start:start + MONTHS_PER_TRANSACTION]
+                    for account_id in account_ids
+                ],
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            bump_all()
+        if progress:
+            progress(min(start + MONTHS_PER_TRANSACTION, len(months)), len(months))
+    return account_entries.count() - existing
@@ -125,6 +125,8 @@ function updateAccountDetails(accountId, bankName, accountName, closeAfterUpdate
         })
     })
     .then(response => response.json())
+    // Moves across every month run as a background job
+    .then(data => data.job ? waitForJob(data.job).then(result => ({ ...data, ...result })) : data)
     .then(data => {
         console.log('Update response:', data);
         
@@ -168,6 +170,8 @@ function deleteAccount(accountId) {
         }
     })
     .then(response => response.json())
+    // Deleting across every month runs as a background job whose result holds the totals
+    .then(data => data.job ? waitForJob(data.job).then(result => ({ ...data, ...result })) : data)
     .then(data => {
         console.log('Delete response:', data);
         
@@ -306,4 +310,38 @@ function getCsrfToken() {
     // If we can't find it, return an empty string
     console.warn('CSRF token not found. Form submissions may fail.');
     return '';
-}
\ No newline at end of file
+}
+
+// ----- Background jobs -----
+const JOB_POLL_INTERVAL_MS = 500;
+// Give up on a job whose status and progress haven't changed for this long
+// (the server requeues jobs whose process died well within it)
+const JOB_STALL_TIMEOUT_MS = 5 * 60 * 1000;
+
+// Resolve with a job's result once it has finished (polling /jobs/<id>/), or reject with its error
+function waitForJob(job, onProgress) {
+    return new Promise((resolve, reject) => {
+        let lastState = null;
+        let lastChange = Date.now();
+        function check(state) {
+            if (onProgress) onProgress(state);
+            if (state.status === 'done') return resolve(state.result || {});
+            if (state.status === 'failed') return reject(new Error(state.error || 'Background job failed'));
+
+            const current = `${state.status}:${state.progress}:${state.total}`;
+            if (current !== lastState) {
+                lastState = current;
+                lastChange = Date.now();
+            } else if (Date.now() - lastChange > JOB_STALL_TIMEOUT_MS) {
+                return reject(new Error('The background job stopped responding; it may still finish later'));
+            }
+            setTimeout(() => {
+                fetch(state.url, { headers: { 'Accept': 'application/json' } })
+                    .then(response => response.json())
+                    .then(check)
+                    .catch(reject);
+            }, JOB_POLL_INTERVAL_MS);
+        }
+        check(job);
+    });
+}
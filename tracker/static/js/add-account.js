@@ -275,12 +275,17 @@ function createAddAccountModal() {
       // Send the form data to the server
       fetch('/add-account/', {
         method: 'POST',
-        headers: { 'X-CSRFToken': token },
+        headers: { 'X-CSRFToken': token, 'Accept': 'application/json' },
         body: data
       })
       .then(response => {
         if (!response.ok) throw new Error('Add failed: ' + response.statusText);
-        return response;
+        return response.json();
+      })
+      .then(data => {
+        if (!data.success) throw new Error(data.error || 'Add failed');
+        // Accounts are added to every month in a background job (waitForJob is in account-management.js)
+        return data.job ? waitForJob(data.job) : data;
       })
       .then(() => {
         // Create a full-page overlay with a refresh message
@@ -14,322 +14,387 @@ document.addEventListener('DOMContentLoaded', function() {
         grandTotals: []
     };
     
-    // Make sure the container is visible temporarily while we collect data
-    const dataContainer = document.getElementById('allMonthsContainer');
-    
-    if (!dataContainer) {
-        console.error("Could not find allMonthsContainer!");
-    } else {
-        const wasHidden = dataContainer.classList.contains('hidden');
-        
-        if (wasHidden) {
-            console.log("Data container was hidden, making it temporarily visible");
-            dataContainer.classList.remove('hidden');
-        }
-        
-        // Now collect the data
-        const monthSections = document.querySelectorAll('.month-data-container');
-        console.log(`Found ${monthSections.length} month sections`);
-        
-        monthSections.forEach(function (monthSection) {
-            const monthName = monthSection.getAttribute('data-month');
-            
-            // Capture all account type totals
-            const currentTotal = parseFloat(monthSection.querySelector('.current-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const savingsTotal = parseFloat(monthSection.querySelector('.savings-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const lendingTotal = parseFloat(monthSection.querySelector('.lending-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const depositsTotal = parseFloat(monthSection.querySelector('.deposits-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const pensionsTotal = parseFloat(monthSection.querySelector('.pensions-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const creditCardTotal = parseFloat(monthSection.querySelector('.credit-cards-total')?.textContent?.replace('£', '')?.trim() || 0);
-            const grandTotal = parseFloat(monthSection.querySelector('.grand-total')?.textContent?.replace('£', '')?.trim() || 0);
-
-            chartData.months.unshift(monthName);
-            chartData.currentTotals.unshift(currentTotal);
-            chartData.savingsTotals.unshift(savingsTotal);
-            chartData.lendingTotals.unshift(lendingTotal);
-            chartData.depositsTotals.unshift(depositsTotal);
-            chartData.pensionsTotals.unshift(pensionsTotal);
-            chartData.creditCardTotals.unshift(creditCardTotal);
-            chartData.grandTotals.unshift(grandTotal);
-            
-            console.log(`Month: ${monthName}, Current: ${currentTotal}, Savings: ${savingsTotal}, Credit Cards: ${creditCardTotal}, Grand Total: ${grandTotal}`);
+    // ----- Fetch the chart series from the time-series API -----
+    const chartCanvas = document.getElementById('financialSummaryChart');
+    if (!chartCanvas) {
+        console.error("Could not find line chart canvas element");
+        return;
+    }
+
+    fetch(chartCanvas.dataset.url)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error);
+            data.months.forEach(month => pushMonthTotals(chartData, month));
+            console.log("Complete chart data:", chartData);
+            renderCharts();
+        })
+        .catch(error => {
+            console.error("Could not load chart data:", error);
+            renderCharts();
         });
-        
-        // Hide the container again if it was hidden before
-        if (wasHidden) {
-            dataContainer.classList.add('hidden');
+
+    function renderCharts() {
+        // Check if we have data
+        if (chartData.months.length === 0) {
+            console.log("No chart data returned for this period");
         }
-    }
-    
-    console.log("Complete chart data:", chartData);
-    
-    // Check if we have data
-    if (chartData.months.length === 0) {
-        console.log("No data found in DOM, using demo data instead");
-    }
-    
 
-    // Initialize line Chart with interactive legend
-    const ctx = document.getElementById('financialSummaryChart');
-    if (ctx) {
-        console.log("Creating enhanced line chart");
-        
-        // Define datasets
-        const lineChartDatasets = [
-            {
-                label: 'Current',
-                data: chartData.currentTotals,
-                backgroundColor: 'rgba(54, 162, 235, 0.2)',
-                borderColor: 'rgba(54, 162, 235, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            },
-            {
-                label: 'Savings',
-                data: chartData.savingsTotals,
-                backgroundColor: 'rgba(153, 102, 255, 0.2)',
-                borderColor: 'rgba(153, 102, 255, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            },
-            {
-                label: 'Lending',
-                data: chartData.lendingTotals,
-                backgroundColor: 'rgba(255, 159, 64, 0.2)',
-                borderColor: 'rgba(255, 159, 64, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            },
-            {
-                label: 'Deposits',
-                data: chartData.depositsTotals,
-                backgroundColor: 'rgba(255, 206, 86, 0.2)',
-                borderColor: 'rgba(255, 206, 86, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            },
-            {
-                label: 'Pensions',
-                data: chartData.pensionsTotals,
-                backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                borderColor: 'rgba(75, 192, 192, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            },
-            {
-                label: 'Credit Cards',
-                data: chartData.creditCardTotals,
-                backgroundColor: 'rgba(255, 99, 132, 0.2)',
-                borderColor: 'rgba(255, 99, 132, 1)',
-                borderWidth: 2,
-                fill: false,
-                tension: 0.1
-            }
-        ];
-        
-        const financialChart = new Chart(ctx.getContext('2d'), {
-            type: 'line',
-            data: {
-                labels: chartData.months,
-                datasets: lineChartDatasets
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    y: {
-                        beginAtZero: false,
-                        title: {
-                            display: true,
-                            text: 'Amount (£)',
-                            font: {
-                                weight: 'bold'
+        // Initialize line Chart with interactive legend
+        const ctx = document.getElementById('financialSummaryChart');
+        if (ctx) {
+            console.log("Creating enhanced line chart");
+
+            // Define datasets
+            const lineChartDatasets = [
+                {
+                    label: 'Current',
+                    data: chartData.currentTotals,
+                    backgroundColor: 'rgba(54, 162, 235, 0.2)',
+                    borderColor: 'rgba(54, 162, 235, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                },
+                {
+                    label: 'Savings',
+                    data: chartData.savingsTotals,
+                    backgroundColor: 'rgba(153, 102, 255, 0.2)',
+                    borderColor: 'rgba(153, 102, 255, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                },
+                {
+                    label: 'Lending',
+                    data: chartData.lendingTotals,
+                    backgroundColor: 'rgba(255, 159, 64, 0.2)',
+                    borderColor: 'rgba(255, 159, 64, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                },
+                {
+                    label: 'Deposits',
+                    data: chartData.depositsTotals,
+                    backgroundColor: 'rgba(255, 206, 86, 0.2)',
+                    borderColor: 'rgba(255, 206, 86, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                },
+                {
+                    label: 'Pensions',
+                    data: chartData.pensionsTotals,
+                    backgroundColor: 'rgba(75, 192, 192, 0.2)',
+                    borderColor: 'rgba(75, 192, 192, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                },
+                {
+                    label: 'Credit Cards',
+                    data: chartData.creditCardTotals,
+                    backgroundColor: 'rgba(255, 99, 132, 0.2)',
+                    borderColor: 'rgba(255, 99, 132, 1)',
+                    borderWidth: 2,
+                    fill: false,
+                    tension: 0.1
+                }
+            ];
+
+            const financialChart = new Chart(ctx.getContext('2d'), {
+                type: 'line',
+                data: {
+                    labels: chartData.months,
+                    datasets: lineChartDatasets
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    scales: {
+                        y: {
+                            beginAtZero: false,
+                            title: {
+                                display: true,
+                                text: 'Amount (£)',
+                                font: {
+                                    weight: 'bold'
+                                }
+                            },
+                            grid: {
+                                color: 'rgba(200, 200, 200, 0.2)'
                             }
                         },
-                        grid: {
-                            color: 'rgba(200, 200, 200, 0.2)'
-                        }
-                    },
-                    x: {
-                        grid: {
-                            color: 'rgba(200, 200, 200, 0.2)'
-                        }
-                    }
-                },
-                plugins: {
-                    tooltip: {
-                        callbacks: {
-                            label: function (context) {
-                                return context.dataset.label + ': £' + context.raw.toFixed(2);
+                        x: {
+                            grid: {
+                                color: 'rgba(200, 200, 200, 0.2)'
                             }
                         }
                     },
-                    legend: {
-                        position: 'top',
-                        labels: {
-                            padding: 16,
-                            usePointStyle: true,
-                            pointStyle: 'circle',
-                            font: {
-                                size: 11
+                    plugins: {
+                        tooltip: {
+                            callbacks: {
+                                label: function (context) {
+                                    return context.dataset.label + ': £' + context.raw.toFixed(2);
+                                }
                             }
                         },
-                        // Enhanced legend behavior - click to toggle visibility
-                        onClick: function(e, legendItem, legend) {
-                            const index = legendItem.datasetIndex;
-                            const ci = legend.chart;
-                            const meta = ci.getDatasetMeta(index);
-                            
-                            // Toggle the hidden property
-                            meta.hidden = meta.hidden === null ? !ci.data.datasets[index].hidden : null;
-                            ci.update();
+                        legend: {
+                            position: 'top',
+                            labels: {
+                                padding: 16,
+                                usePointStyle: true,
+                                pointStyle: 'circle',
+                                font: {
+                                    size: 11
+                                }
+                            },
+                            // Enhanced legend behavior - click to toggle visibility
+                            onClick: function(e, legendItem, legend) {
+                                const index = legendItem.datasetIndex;
+                                const ci = legend.chart;
+                                const meta = ci.getDatasetMeta(index);
+
+                                // Toggle the hidden property
+                                meta.hidden = meta.hidden === null ? !ci.data.datasets[index].hidden : null;
+                                ci.update();
+                            }
                         }
                     }
                 }
-            }
-        });
-    } else {
-        console.error("Could not find line chart canvas element");
-    }
-
-    // ----- Pie Chart with Labels - Assets and Liabilities Only -----
-    // Make sure to use the data from the latest month
-    const latestMonth = 0; // Index 0 since we unshifted the data
-    
-    // Calculate total assets 
-    const totalAssets = (
-        (chartData.currentTotals[latestMonth] || 0) + 
-        (chartData.savingsTotals[latestMonth] || 0) + 
-        (chartData.depositsTotals[latestMonth] || 0) + 
-        (chartData.lendingTotals[latestMonth] || 0)
-    );
-    
-    // Calculate total liabilities (use absolute value)
-    const totalLiabilities = Math.abs(chartData.creditCardTotals[latestMonth] || 0);
-    
-    console.log("Pie chart data - Assets:", totalAssets, "Liabilities:", totalLiabilities);
-    
-    // Force minimum values to ensure pie chart is visible even with no data
-    const minAssets = totalAssets > 0 ? totalAssets : 1000;
-    const minLiabilities = totalLiabilities > 0 ? totalLiabilities : 100;
-    
-    // Simple assets/liabilities pie chart data
-    const pieChartData = {
-        labels: ['Total Assets', 'Total Liabilities'],
-        datasets: [{
-            data: [
-                minAssets,
-                minLiabilities
-            ],
-            backgroundColor: [
-                'rgba(75, 192, 192, 0.7)', // Total Assets
-                'rgba(255, 99, 132, 0.7)' // Total Liabilities
-            ],
-            borderColor: [
-                'rgba(75, 192, 192, 1)', // Total Assets
-                'rgba(255, 99, 132, 1)' // Total Liabilities
-            ],
-            borderWidth: 1
-        }]
-    };
-    
-    // Custom plugin for labels inside pie chart
-    const pieChartLabelsPlugin = {
-        id: 'pieChartLabels',
-        beforeDraw: function(chart) {
-            const width = chart.width;
-            const height = chart.height;
-            const ctx = chart.ctx;
-            ctx.restore();
-            
-            // Calculate percentages
-            const total = chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
-            
-            // Font settings
-            const fontSize = (height / 114).toFixed(2);
-            ctx.font = fontSize + 'em sans-serif';
-            ctx.textBaseline = 'middle';
-            
-            // Draw each slice's text
-            const meta = chart.getDatasetMeta(0);
-            meta.data.forEach(element => {
-                const dataIndex = element.index;
-                const value = chart.data.datasets[0].data[dataIndex];
-                
-                // Only draw text if slice is large enough (more than 5%)
-                if (value / total > 0.05) {
-                    // Calculate percentage
-                    const percentage = ((value / total) * 100).toFixed(1) + '%';
-                    
-                    // Format monetary value
-                    const monetary = '£' + value.toLocaleString();
-                    
-                    // Get position
-                    const center = element.getCenterPoint();
-                    
-                    // Draw text
-                    ctx.fillStyle = '#fff';
-                    ctx.textAlign = 'center';
-                    ctx.fillText(percentage, center.x, center.y - (fontSize * 8));
-                    ctx.fillText(monetary, center.x, center.y + (fontSize * 8));
-                }
             });
-            
-            ctx.save();
+        } else {
+            console.error("Could not find line chart canvas element");
         }
-    };
-    
-    const pieCtx = document.getElementById('assetsLiabilitiesPieChart');
-    if (pieCtx) {
-        console.log("Creating enhanced pie chart");
-        
-        // Use the simple assets/liabilities view
-        const pieChart = new Chart(pieCtx.getContext('2d'), {
-            type: 'pie',
-            plugins: [pieChartLabelsPlugin],
-            data: pieChartData,
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {
-                    legend: {
-                        position: 'top',
-                        display: true,
-                        labels: {
-                            padding: 16,
-                            usePointStyle: true,
-                            pointStyle: 'circle',
-                            font: {
-                                size: 11
+
+        // ----- Pie Chart with Labels - Assets and Liabilities Only -----
+        // Make sure to use the data from the latest month
+        const latestMonth = chartData.months.length - 1; // Series is in chronological order
+
+        // Calculate total assets 
+        const totalAssets = (
+            (chartData.currentTotals[latestMonth] || 0) + 
+            (chartData.savingsTotals[latestMonth] || 0) + 
+            (chartData.depositsTotals[latestMonth] || 0) + 
+            (chartData.lendingTotals[latestMonth] || 0)
+        );
+
+        // Calculate total liabilities (use absolute value)
+        const totalLiabilities = Math.abs(chartData.creditCardTotals[latestMonth] || 0);
+
+        console.log("Pie chart data - Assets:", totalAssets, "Liabilities:", totalLiabilities);
+
+        // Force minimum values to ensure pie chart is visible even with no data
+        const minAssets = totalAssets > 0 ? totalAssets : 1000;
+        const minLiabilities = totalLiabilities > 0 ? totalLiabilities : 100;
+
+        // Simple assets/liabilities pie chart data
+        const pieChartData = {
+            labels: ['Total Assets', 'Total Liabilities'],
+            datasets: [{
+                data: [
+                    minAssets,
+                    minLiabilities
+                ],
+                backgroundColor: [
+                    'rgba(75, 192, 192, 0.7)', // Total Assets
+                    'rgba(255, 99, 132, 0.7)' // Total Liabilities
+                ],
+                borderColor: [
+                    'rgba(75, 192, 192, 1)', // Total Assets
+                    'rgba(255, 99, 132, 1)' // Total Liabilities
+                ],
+                borderWidth: 1
+            }]
+        };
+
+        // Custom plugin for labels inside pie chart
+        const pieChartLabelsPlugin = {
+            id: 'pieChartLabels',
+            beforeDraw: function(chart) {
+                const width = chart.width;
+                const height = chart.height;
+                const ctx = chart.ctx;
+                ctx.restore();
+
+                // Calculate percentages
+                const total = chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
+
+                // Font settings
+                const fontSize = (height / 114).toFixed(2);
+                ctx.font = fontSize + 'em sans-serif';
+                ctx.textBaseline = 'middle';
+
+                // Draw each slice's text
+                const meta = chart.getDatasetMeta(0);
+                meta.data.forEach(element => {
+                    const dataIndex = element.index;
+                    const value = chart.data.datasets[0].data[dataIndex];
+
+                    // Only draw text if slice is large enough (more than 5%)
+                    if (value / total > 0.05) {
+                        // Calculate percentage
+                        const percentage = ((value / total) * 100).toFixed(1) + '%';
+
+                        // Format monetary value
+                        const monetary = '£' + value.toLocaleString();
+
+                        // Get position
+                        const center = element.getCenterPoint();
+
+                        // Draw text
+                        ctx.fillStyle = '#fff';
+                        ctx.textAlign = 'center';
+                        ctx.fillText(percentage, center.x, center.y - (fontSize * 8));
+                        ctx.fillText(monetary, center.x, center.y + (fontSize * 8));
+                    }
+                });
+
+                ctx.save();
+            }
+        };
+
+        const pieCtx = document.getElementById('assetsLiabilitiesPieChart');
+        if (pieCtx) {
+            console.log("Creating enhanced pie chart");
+
+            // Use the simple assets/liabilities view
+            const pieChart = new Chart(pieCtx.getContext('2d'), {
+                type: 'pie',
+                plugins: [pieChartLabelsPlugin],
+                data: pieChartData,
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {
+                        legend: {
+                            position: 'top',
+                            display: true,
+                            labels: {
+                                padding: 16,
+                                usePointStyle: true,
+                                pointStyle: 'circle',
+                                font: {
+                                    size: 11
+                                }
                             }
-                        }
-                    },
-                    tooltip: {
-                        callbacks: {
-                            label: function (context) {
-                                const label = context.label || '';
-                                const value = context.raw;
-                                const total = context.chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
-                                const percentage = ((value / total) * 100).toFixed(1);
-                                return `${label}: £${value.toLocaleString()} (${percentage}%)`;
+                        },
+                        tooltip: {
+                            callbacks: {
+                                label: function (context) {
+                                    const label = context.label || '';
+                                    const value = context.raw;
+                                    const total = context.chart.data.datasets[0].data.reduce((a, b) => a + b, 0);
+                                    const percentage = ((value / total) * 100).toFixed(1);
+                                    return `${label}: £${value.toLocaleString()} (${percentage}%)`;
+                                }
                             }
                         }
+                    },
+                    animation: {
+                        animateRotate: true,
+                        animateScale: true
                     }
-                },
-                animation: {
-                    animateRotate: true,
-                    animateScale: true
                 }
-            }
-        });
-        
-        console.log("Pie chart created successfully");
-    } else {
-        console.error("Could not find pie chart canvas element");
+            });
+
+            console.log("Pie chart created successfully");
+        } else {
+            console.error("Could not find pie chart canvas element");
+        }
+    }
+});
+
+/**
+ * Adds one month from the time-series API to the end of the chart data series
+ */
+function pushMonthTotals(chartData, month) {
+    chartData.months.push(month.label);
+    chartData.currentTotals.push(month.current_total);
+    chartData.savingsTotals.push(month.savings_total);
+    chartData.lendingTotals.push(month.lending_total);
+    chartData.depositsTotals.push(month.deposits_total);
+    chartData.pensionsTotals.push(month.pensions_total);
+    chartData.creditCardTotals.push(month.credit_cards_total);
+    chartData.grandTotals.push(month.grand_total);
+}
+
+/**
+ * Formats a Date as the API's YYYY-MM month parameter
+ */
+function formatMonthParam(monthDate) {
+    return `${monthDate.getFullYear()}-${String(monthDate.getMonth() + 1).padStart(2, '0')}`;
+}
+
+// ----- Older months, loaded a year of history at a time -----
+function parseMonthParam(value) {
+    const [year, month] = value.split('-').map(part => parseInt(part, 10));
+    return new Date(year, month - 1, 1);
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const loadButton = document.getElementById('loadEarlierMonths');
+    const canvas = document.getElementById('financialSummaryChart');
+    if (!loadButton || !canvas) return;
+
+    // Last month of the next page: the month before the charted ones at first,
+    // then the newest earlier month with data, so gaps in the history are skipped
+    let nextEnd = new Date(parseInt(canvas.dataset.startYear, 10) - 1, 11, 1);
+
+    function loadPage(end) {
+        const start = new Date(end.getFullYear(), end.getMonth() - 11, 1);
+        return fetch(`${canvas.dataset.url}?start=${formatMonthParam(start)}&end=${formatMonthParam(end)}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) throw new Error(data.error);
+                // Only the first page can be empty (the year before the dashboard's)
+                if (!data.months.length && data.previous) {
+                    return loadPage(parseMonthParam(data.previous));
+                }
+                return data;
+            });
     }
-});
\ No newline at end of file
+
+    loadButton.addEventListener('click', function() {
+        loadButton.disabled = true;
+
+        loadPage(nextEnd)
+            .then(data => {
+                // Older months go in front of the months already charted
+                const chart = Chart.getChart('financialSummaryChart');
+                if (chart && data.months.length) {
+                    const older = {
+                        months: [], currentTotals: [], savingsTotals: [], lendingTotals: [],
+                        depositsTotals: [], pensionsTotals: [], creditCardTotals: [], grandTotals: []
+                    };
+                    data.months.forEach(month => pushMonthTotals(older, month));
+
+                    chart.data.labels.unshift(...older.months);
+                    const seriesByLabel = {
+                        'Current': older.currentTotals,
+                        'Savings': older.savingsTotals,
+                        'Lending': older.lendingTotals,
+                        'Deposits': older.depositsTotals,
+                        'Pensions': older.pensionsTotals,
+                        'Credit Cards': older.creditCardTotals
+                    };
+                    chart.data.datasets.forEach(dataset => {
+                        if (seriesByLabel[dataset.label]) dataset.data.unshift(...seriesByLabel[dataset.label]);
+                    });
+                    chart.update();
+                }
+
+                if (data.previous) {
+                    nextEnd = parseMonthParam(data.previous);
+                    loadButton.disabled = false;
+                } else {
+                    loadButton.remove();
+                }
+            })
+            .catch(error => {
+                console.error('Error loading earlier months:', error);
+                loadButton.disabled = false;
+            });
+    });
+});
@@ -57,6 +57,9 @@ document.addEventListener('DOMContentLoaded', function () {
     
     // Attach edit account button handlers
     attachEditAccountsButtonHandlers();
+
+    // Pick up changes made in other tabs and sessions
+    watchChanges();
 });
 
 // Make sure important functions are available globally
@@ -138,46 +141,76 @@ function attachEditAccountsButtonHandlers() {
             console.log('Edit Accounts button clicked for', this.getAttribute('data-month-full'));
             
             const monthName = this.getAttribute('data-month-full');
-            const monthDetailView = document.getElementById('monthDetailView');
-            const monthDetailContent = document.getElementById('monthDetailContent');
-            const monthContainer = document.querySelector(`.month-data-container[data-month="${monthName}"]`);
-
-            if (monthContainer) {
-                console.log('Found month container for', monthName);
-                
-                // Update title
-                document.getElementById('detailViewTitle').textContent = monthName + ' Details';
+            const monthDate = this.getAttribute('data-month-date');
 
-                // Get all tab contents from the source
-                const tabContents = monthContainer.querySelectorAll('.account-tab-content');
-                
-                // Clear existing content
-                monthDetailContent.innerHTML = '';
-                
-                // Clone each tab content
-                tabContents.forEach(content => {
-                    const clone = content.cloneNode(true);
-                    monthDetailContent.appendChild(clone);
+            loadMonthContainer(monthName, monthDate)
+                .then(monthContainer => showMonthDetail(monthName, monthContainer))
+                .catch(error => {
+                    console.error('Month container not found for', monthName, error);
+                    showNotification('Could not load ' + monthName + '. Please try again.', 'error');
                 });
+        });
+    });
+    
+    console.log('Edit Account button handlers attached');
+}
 
-                // Show the detail view
-                monthDetailView.classList.remove('hidden');
+/**
+ * Resolves with the hidden .month-data-container for a month, fetching and
+ * caching it from the month endpoint the first time it is opened
+ */
+function loadMonthContainer(monthName, monthDate) {
+    const existing = document.querySelector(`.month-data-container[data-month="${monthName}"]`);
+    if (existing) return Promise.resolve(existing);
+
+    const dataContainer = document.getElementById('allMonthsContainer');
+    return fetch(`${dataContainer.dataset.url}?month=${monthDate}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error);
+            dataContainer.insertAdjacentHTML('beforeend', data.html);
+
+            const monthContainer = dataContainer.querySelector(`.month-data-container[data-month="${monthName}"]`);
+            if (!monthContainer) throw new Error('No entries for ' + monthName);
+            return monthContainer;
+        });
+}
 
-                // Setup tabs
-                setupTabs();
+/**
+ * Copies a month's account tabs into the detail view and shows it
+ */
+function showMonthDetail(monthName, monthContainer) {
+    console.log('Found month container for', monthName);
+    
+    const monthDetailView = document.getElementById('monthDetailView');
+    const monthDetailContent = document.getElementById('monthDetailContent');
 
-                // Setup editable amounts
-                setupEditableAmounts();
+    // Update title
+    document.getElementById('detailViewTitle').textContent = monthName + ' Details';
 
-                // Scroll to the detail view
-                monthDetailView.scrollIntoView({ behavior: 'smooth' });
-            } else {
-                console.error('Month container not found for', monthName);
-            }
-        });
-    });
+    // Get all tab contents from the source
+    const tabContents = monthContainer.querySelectorAll('.account-tab-content');
     
-    console.log('Edit Account button handlers attached');
+    // Clear existing content
+    monthDetailContent.innerHTML = '';
+    
+    // Clone each tab content
+    tabContents.forEach(content => {
+        const clone = content.cloneNode(true);
+        monthDetailContent.appendChild(clone);
+    });
+
+    // Show the detail view
+    monthDetailView.classList.remove('hidden');
+
+    // Setup tabs
+    setupTabs();
+
+    // Setup editable amounts
+    setupEditableAmounts();
+
+    // Scroll to the detail view
+    monthDetailView.scrollIntoView({ behavior: 'smooth' });
 }
 
 /**
@@ -239,71 +272,185 @@ function handleEditableAmountClick(e) {
     });
 }
 
+// Amount edits waiting to be sent, keyed by entry id
+const pendingAmountEdits = new Map();
+const AMOUNT_SAVE_DELAY_MS = 400;
+let amountSaveTimer = null;
+
 /**
- * Saves an updated account amount
+ * Queues an updated account amount; edits made in quick succession are
+ * coalesced and saved together in one request
  */
 function saveAmount(id, newAmount, originalContent, element, accountType, monthName) {
     // Show saving indicator
-    const originalElement = element.cloneNode(true);
     element.innerHTML = '<div class="loading-spinner inline-block mr-1" style="width: 12px; height: 12px;"></div> Saving...';
     
-    console.log('Saving amount:', id, newAmount, accountType, monthName);
-    
-    // Make AJAX request to update amount
-    fetch(`/update-amount/${id}/`, {
+    console.log('Queueing amount:', id, newAmount, accountType, monthName);
+
+    const previous = pendingAmountEdits.get(id);
+    pendingAmountEdits.set(id, {
+        amount: newAmount,
+        element: element,
+        // Keep the content from before the first queued edit for reverts
+        originalContent: previous ? previous.originalContent : originalContent,
+        monthName: monthName
+    });
+
+    clearTimeout(amountSaveTimer);
+    amountSaveTimer = setTimeout(flushAmountEdits, AMOUNT_SAVE_DELAY_MS);
+}
+
+/**
+ * Sends all queued amount edits to the batch endpoint
+ */
+function flushAmountEdits() {
+    if (pendingAmountEdits.size === 0) return;
+
+    const edits = new Map(pendingAmountEdits);
+    pendingAmountEdits.clear();
+
+    const revertAll = () => {
+        edits.forEach(edit => { edit.element.innerHTML = edit.originalContent; });
+    };
+
+    fetch('/update-amounts/', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
             'X-CSRFToken': getCsrfToken(),
         },
         body: JSON.stringify({
-            amount: newAmount
+            entries: Array.from(edits, ([id, edit]) => ({ id: id, amount: edit.amount }))
         })
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            // Update the element with new amount
-            const amount = parseFloat(data.amount);
-            element.innerHTML = '£' + amount.toFixed(2);
-            element.setAttribute('data-amount', amount);
-
-            // Set color based on amount
-            if (amount < 0) {
-                element.classList.remove('text-green-600');
-                element.classList.add('text-red-600');
-            } else {
-                element.classList.remove('text-red-600');
-                element.classList.add('text-green-600');
-            }
+            data.entries.forEach(saved => {
+                const edit = edits.get(String(saved.id));
+                if (!edit) return;
 
-            console.log('Successfully saved amount. Updating UI with new totals:', data);
+                showAmount(edit.element, saved.amount);
+            });
 
-            // Update totals
-            updateTotals(monthName, data.current_total, data.savings_total, data.lending_total, data.deposits_total, data.pensions_total, data.credit_cards_total, data.grand_total);
+            console.log('Successfully saved amounts. Updating UI with new totals:', data);
 
-            // Update the month cards in the scroller
-            updateMonthCard(monthName, data.current_total, data.savings_total, data.lending_total, data.deposits_total, data.pensions_total, data.credit_cards_total, data.grand_total);
+            // Totals come back once per affected month
+            Object.entries(data.months).forEach(([monthName, totals]) => applyMonthTotals(monthName, totals));
 
-            // Update the chart
-            updateChart(monthName, data.current_total, data.savings_total, data.lending_total, data.deposits_total, data.pensions_total, data.credit_cards_total, data.grand_total);
-            
             // Show success notification
-            showNotification(`Amount updated to £${amount.toFixed(2)}`, 'success');
+            const count = data.entries.length;
+            showNotification(count === 1 ? 'Amount updated' : `${count} amounts updated`, 'success');
         } else {
             // Revert to original content on error
-            element.innerHTML = originalContent;
-            console.error('Error updating amount:', data.error);
-            showNotification('Error updating amount: ' + data.error, 'error');
+            revertAll();
+            console.error('Error updating amounts:', data.error);
+            showNotification('Error updating amounts: ' + data.error, 'error');
         }
     })
     .catch(error => {
-        element.innerHTML = originalContent;
+        revertAll();
         console.error('Error:', error);
-        showNotification('Error updating amount. Please try again.', 'error');
+        showNotification('Error updating amounts. Please try again.', 'error');
     });
 }
 
+/**
+ * Shows a saved amount in an editable amount element, coloured by sign
+ */
+function showAmount(element, value) {
+    const amount = parseFloat(value);
+    element.innerHTML = '£' + amount.toFixed(2);
+    element.setAttribute('data-amount', amount);
+
+    if (amount < 0) {
+        element.classList.remove('text-green-600');
+        element.classList.add('text-red-600');
+    } else {
+        element.classList.remove('text-red-600');
+        element.classList.add('text-green-600');
+    }
+}
+
+/**
+ * Updates a month's totals, card and chart point from a totals object
+ */
+function applyMonthTotals(monthName, totals) {
+    const args = [monthName, totals.current_total, totals.savings_total, totals.lending_total, totals.deposits_total, totals.pensions_total, totals.credit_cards_total, totals.grand_total];
+    updateTotals(...args);
+    updateMonthCard(...args);
+    updateChart(...args);
+}
+
+/**
+ * Applies changes made elsewhere (another tab, the admin, an import) from
+ * the /changes/ feed: amounts, removed rows and month totals
+ */
+function applyChanges(feed) {
+    if (feed.reload) {
+        showNotification('This data was changed elsewhere. Reload the page to see the latest.', 'error');
+        return;
+    }
+    Object.entries(feed.months).forEach(([monthName, month]) => {
+        month.entries.forEach(entry => {
+            document.querySelectorAll(`.editable-amount[data-id="${entry.id}"]`).forEach(element => {
+                // Leave amounts being edited or saved here alone
+                if (element.querySelector('input') || pendingAmountEdits.has(String(entry.id))) return;
+                showAmount(element, entry.amount);
+            });
+        });
+
+        const current = new Set(month.entry_ids.map(String));
+        document.querySelectorAll(`.editable-amount[data-month="${monthName}"]`).forEach(element => {
+            if (current.has(element.getAttribute('data-id'))) return;
+            const row = element.closest('.account-row');
+            if (row) row.remove();
+        });
+
+        applyMonthTotals(monthName, month.totals);
+    });
+}
+
+// How often pages poll /changes/ when the server can't stream (WSGI)
+const CHANGE_POLL_MS = 15000;
+
+/**
+ * Follows changes from the cursor the page was rendered at: over the
+ * change stream when the server offers one, otherwise by polling
+ */
+function watchChanges() {
+    const page = document.getElementById('changeFeed');
+    if (!page) return;
+
+    if (page.dataset.streamUrl && typeof EventSource !== 'undefined') {
+        const source = new EventSource(`${page.dataset.streamUrl}?since=${page.dataset.cursor}`);
+        source.addEventListener('changes', event => {
+            const feed = JSON.parse(event.data);
+            applyChanges(feed);
+            if (feed.reload) source.close();
+        });
+        return;
+    }
+
+    let cursor = page.dataset.cursor;
+    const poll = () => {
+        // Hidden tabs skip a round
+        if (document.hidden) {
+            setTimeout(poll, CHANGE_POLL_MS);
+            return;
+        }
+        fetch(`${page.dataset.pollUrl}?since=${cursor}`)
+            .then(response => response.json())
+            .then(feed => {
+                applyChanges(feed);
+                cursor = feed.cursor;
+                if (!feed.reload) setTimeout(poll, CHANGE_POLL_MS);
+            })
+            .catch(() => setTimeout(poll, CHANGE_POLL_MS));
+    };
+    setTimeout(poll, CHANGE_POLL_MS);
+}
+
 /**
  * Safely updates totals for a month
  * @param {string} monthName - Name of the month
@@ -1,5 +1,7 @@
 from django import template
-from decimal import Decimal
+
+from ..aggregation import ACCOUNT_TYPE_KEYS, ZERO, net_worth
+from ..money import Money
 
 register = template.Library()
 
@@ -15,17 +17,17 @@ def subtract(value, arg):
 def sum_amounts(entries):
     """Sums the amounts from a list of entries"""
     try:
-        return sum(entry.amount for entry in entries)
+        return Money.sum(entry.amount for entry in entries)
     except (ValueError, TypeError, AttributeError):
         return 0
 
 @register.filter
 def add(value1, value2):
-    """Add two decimal values together"""
+    """Add two amounts together"""
     try:
         return value1 + value2
     except (TypeError, ValueError):
-        return Decimal('0.00')
+        return ZERO
 
 @register.filter
 def filter_by_type(entries, account_type):
@@ -37,17 +39,14 @@ def filter_by_type(entries, account_type):
     
 @register.filter
 def calculate_total_assets(value):
+    """Net worth of a grouped month (see group_entries_by_month) as a 2dp string"""
     if not value:
         return "0.00"
     try:
-        current = sum(float(entry.amount) for entry in value.get('current', []))
-        savings = sum(float(entry.amount) for entry in value.get('savings', []))
-        lending = sum(float(entry.amount) for entry in value.get('lending', []))
-        deposits = sum(float(entry.amount) for entry in value.get('deposits', []))
-        pensions = sum(float(entry.amount) for entry in value.get('pensions', []))
-        credit_cards = sum(float(entry.amount) for entry in value.get('credit_cards', []))
-        
-        total = current + savings + lending + deposits + pensions - credit_cards
-        return f"{total:.2f}"
+        totals = {
+            f"{key}_total": Money.sum(entry.amount for entry in value.get(key, []))
+            for key in ACCOUNT_TYPE_KEYS.values()
+        }
+        return f"{net_worth(totals):.2f}"
     except (AttributeError, TypeError):
-        return "0.00"
\ No newline at end of file
+        return "0.00"
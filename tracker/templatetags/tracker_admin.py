@@ -0,0 +1,60 @@
+from django import template
+from django.utils.formats import date_format
+from django.utils.text import capfirst
+
+from ..caching import cached_by_generation
+from ..models import MonthlySummary
+
+register = template.Library()
+
+
+def stored_months():
+    """Every month that has a summary row, oldest first (cached until months are added or removed)"""
+    return cached_by_generation('admin-stored-months', lambda: list(
+        MonthlySummary.objects.order_by('month').values_list('month', flat=True)
+    ))
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def entry_date_hierarchy(cl):
+    """The admin date_hierarchy for MonthlyEntry, drawn from the stored months.
+
+    Django's own tag finds the years and months with a DISTINCT over every
+    entry; the summary table has one row per month instead. Entries are
+    dated the first of their month, so there is no day level.
+    """
+    field_name = cl.date_hierarchy
+    year_field, month_field = f"{field_name}__year", f"{field_name}__month"
+    year_lookup = cl.params.get(year_field)
+    month_lookup = cl.params.get(month_field)
+    months = stored_months()
+
+    def link(filters):
+        return cl.get_query_string(filters, [f"{field_name}__"])
+
+    if year_lookup and month_lookup:
+        month = next((m for m in months if (m.year, m.month) == (int(year_lookup), int(month_lookup))), None)
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year_lookup}), 'title': str(year_lookup)},
+            'choices': [{'title': capfirst(date_format(month, 'YEAR_MONTH_FORMAT'))}] if month else [],
+        }
+    if year_lookup:
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': 'All dates'},
+            'choices': [
+                {
+                    'link': link({year_field: year_lookup, month_field: month.month}),
+                    'title': capfirst(date_format(month, 'YEAR_MONTH_FORMAT')),
+                }
+                for month in months if month.year == int(year_lookup)
+            ],
+        }
+    return {
+        'show': True,
+        'choices': [
+            {'link': link({year_field: year}), 'title': str(year)}
+            for year in sorted({month.year for month in months})
+        ],
+    }
@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from ..assets import TRACKER_BUNDLE, TRACKER_SCRIPTS
+
+register = template.Library()
+
+
+@register.simple_tag
+def tracker_scripts():
+    """Script tags for the page JS: the bundle when TRACKER_JS_BUNDLE is set, else each file"""
+    names = [TRACKER_BUNDLE] if settings.TRACKER_JS_BUNDLE else TRACKER_SCRIPTS
+    return format_html_join('\n', '<script src="{}"></script>', ((static(name),) for name in names))
@@ -1,3 +1,824 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Max, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .aggregation import (
+    aggregate_totals, as_json_totals, empty_totals, month_totals, rebuild_summaries, refresh_summaries, summary_totals,
+    totals_for_months,
+)
+from .analytics import build_net_worth_series
+from .caching import bump_all, bump_months, cached_by_month
+from .changes import RESEND_OVERLAP, changes_since, latest_cursor
+from .exporting import export_rows
+from . import admin as tracker_admin, jobs
+from .importing import import_entries
+from .models import Account, ChangeLog, Job, MonthlyEntry, MonthlySummary
+from .money import MAX_PENCE, Money
+from .provisioning import BASE_ACCOUNTS, _month_rows, add_accounts, generate_year_data, provision_years
+from .views import _load_month_groups, _load_summaries, get_month_key
+
+
+# Over-budget views fail, jobs run inline, and nothing needs collectstatic or
+# touches the shared file cache
+test_settings = override_settings(
+    TRACKER_QUERY_BUDGET_STRICT=True,
+    TRACKER_JOBS_EAGER=True,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tracker-tests'}},
+)
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@test_settings
+class QueryPlanTests(TestCase):
+    """The hot queries search an index rather than scanning a table"""
+
+    month = date(2024, 6, 1)
+
+    def assertIndexed(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            result = func()
+            if hasattr(result, '__next__'):
+                list(result)
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects, 'no SELECT queries were run')
+        for sql in selects:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = [row[-1] for row in cursor.fetchall()]
+            scans = [step for step in plan if step.startswith('SCAN ')]
+            self.assertEqual(scans, [], f"{sql}\n" + '\n'.join(plan))
+        return selects
+
+    def test_month_totals(self):
+        self.assertIndexed(lambda: month_totals(self.month))
+
+    def test_totals_for_months(self):
+        self.assertIndexed(lambda: totals_for_months([date(2024, 1, 1), self.month]))
+
+    def test_month_totals_use_covering_index(self):
+        sql, = self.assertIndexed(lambda: month_totals(self.month))
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('COVERING INDEX entry_month_totals_idx', plan)
+
+    def test_month_template_rows(self):
+        self.assertIndexed(lambda: _month_rows(self.month))
+
+    def test_month_groups(self):
+        self.assertIndexed(lambda: _load_month_groups([self.month]))
+
+    def test_summaries(self):
+        self.assertIndexed(lambda: _load_summaries([self.month]))
+
+    def test_account_lookup(self):
+        self.assertIndexed(lambda: Account.objects.filter(bank_name='Barclays', account_name='Current').first())
+
+    def test_account_months(self):
+        account = Account.objects.create(bank_name='Plan', account_name='Test', account_type='Savings')
+        self.assertIndexed(lambda: list(account.entries.dates('date', 'month')))
+
+    def test_export_by_account_type(self):
+        self.assertIndexed(lambda: export_rows(account_type='Savings'))
+
+
+class MoneyTests(SimpleTestCase):
+
+    def test_parse_rounds_half_up_to_the_penny(self):
+        self.assertEqual(Money.parse('12.345').pence, 1235)
+        self.assertEqual(Money.parse('-12.345').pence, -1235)
+        self.assertEqual(Money.parse('1,234.5').pence, 123450)
+        self.assertEqual(Money.parse(Decimal('0.1')).pence, 10)
+        self.assertEqual(Money.parse(7).pence, 700)
+
+    def test_parse_rejects_non_amounts(self):
+        for value in ['', 'abc', 'NaN', 'Infinity', None, str(MAX_PENCE // 100 + 1)]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                Money.parse(value)
+
+    def test_round_trips_through_str(self):
+        for text in ['0.00', '0.10', '-12.50', '1234567.89']:
+            with self.subTest(text=text):
+                self.assertEqual(str(Money.parse(text)), text)
+                self.assertEqual(Money.parse(str(Money.parse(text))), Money.parse(text))
+
+    def test_arithmetic_is_exact(self):
+        tenth = Money.parse('0.10')
+        self.assertEqual(sum([tenth] * 3), Money.parse('0.30'))
+        self.assertEqual(Money.sum([tenth] * 3), Money.parse('0.30'))
+        self.assertEqual(Money(100) - Money(250), Money(-150))
+        self.assertEqual(-Money(5), Money(-5))
+        self.assertEqual(Money(100) / 3, Money(33))
+        self.assertEqual(Money(300) / Money(100), Decimal(3))
+        with self.assertRaises(TypeError):
+            Money(100) + 1
+
+    def test_compares_with_pounds(self):
+        self.assertEqual(Money(1250), Decimal('12.50'))
+        self.assertLess(Money(1249), 12.5)
+        self.assertEqual(hash(Money(1250)), hash(Decimal('12.50')))
+        self.assertFalse(Money(0))
+        self.assertEqual(f"{Money(-1250):,.1f}", '-12.5')
+        self.assertEqual(float(Money(1250)), 12.5)
+
+
+class NetWorthSeriesTests(SimpleTestCase):
+
+    def months(self, start: date, count: int):
+        return [date(start.year + (start.month - 1 + n) // 12, (start.month - 1 + n) % 12 + 1, 1) for n in range(count)]
+
+    def test_consecutive_months(self):
+        points = [(month, Money(n * 100)) for n, month in enumerate(self.months(date(2023, 1, 1), 13), 1)]
+        series = build_net_worth_series(points)
+
+        self.assertIsNone(series[0]['delta'])
+        self.assertEqual(series[1]['delta'], Money(100))
+        self.assertIsNone(series[1]['rolling_3'])
+        self.assertEqual(series[2]['rolling_3'], Money(200))
+        self.assertIsNone(series[10]['rolling_12'])
+        self.assertEqual(series[11]['rolling_12'], Money(650))
+        self.assertEqual(series[12]['rolling_12'], Money(750))
+        # 1300 against 100 a year earlier
+        self.assertEqual(series[12]['yoy_growth'], Decimal('1200.00'))
+        self.assertIsNone(series[11]['yoy_growth'])
+
+    def test_gaps_are_missing_months(self):
+        series = build_net_worth_series([
+            (date(2010, 1, 1), Money(100)),
+            (date(2012, 6, 1), Money(200)),
+            (date(2025, 1, 1), Money(300)),
+            (date(2025, 2, 1), Money(400)),
+            (date(2025, 3, 1), Money(600)),
+        ])
+        self.assertEqual([point['delta'] for point in series], [None, None, None, Money(100), Money(200)])
+        self.assertEqual([point['rolling_3'] for point in series], [None, None, None, None, Money(433)])
+        self.assertTrue(all(point['rolling_12'] is None for point in series))
+
+    def test_year_over_year_needs_a_non_zero_year_ago(self):
+        series = build_net_worth_series([
+            (date(2023, 5, 1), Money(0)),
+            (date(2024, 5, 1), Money(100)),
+            (date(2025, 5, 1), Money(50)),
+        ])
+        self.assertEqual([point['yoy_growth'] for point in series], [None, None, Decimal('-50.00')])
+
+
+@test_settings
+class MoneyFieldTests(TestCase):
+
+    def setUp(self):
+        self.account = Account.objects.create(bank_name='Bank', account_name='Money', account_type='Savings')
+        self.month = date(1999, 1, 1)
+
+    def test_saves_pence_and_loads_money(self):
+        entry = MonthlyEntry.objects.create(date=self.month, account=self.account, amount=Decimal('12.34'))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT amount FROM {MonthlyEntry._meta.db_table} WHERE id = %s", [entry.id])
+            self.assertEqual(cursor.fetchone()[0], 1234)
+        entry.refresh_from_db()
+        self.assertEqual(entry.amount, Money(1234))
+        self.assertIsInstance(entry.amount, Money)
+
+    def test_filters_and_sums_in_pence(self):
+        MonthlyEntry.objects.bulk_create([
+            MonthlyEntry(date=self.month, account=self.account, amount='0.10'),
+            MonthlyEntry(date=self.month.replace(month=2), account=self.account, amount=Money(20)),
+        ])
+        entries = MonthlyEntry.objects.filter(account=self.account)
+        self.assertEqual(entries.aggregate(total=Sum('amount'))['total'], Money(30))
+        self.assertEqual(entries.filter(amount__gt=Decimal('0.10')).count(), 1)
+        self.assertEqual(entries.filter(amount=0).count(), 0)
+
+    def test_rejects_ambiguous_numbers(self):
+        for value in [5, 0.1, True]:
+            with self.subTest(value=value), self.assertRaises(TypeError):
+                MonthlyEntry.objects.filter(amount=value).exists()
+
+
+@test_settings
+class MigrationTestCase(TransactionTestCase):
+    """Migrates the tracker app back to migrate_from, for setUpBeforeMigration() to fill, then forward to migrate_to"""
+
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        self.addCleanup(self._migrate_to_latest)
+        # Start empty: the seeded rows can't be migrated back past 0003
+        MonthlyEntry.objects.all().delete()
+        MonthlySummary.objects.all().delete()
+        Account.objects.all().delete()
+        self.apps = self._migrate(self.migrate_from)
+        self.setUpBeforeMigration(self.apps)
+        self.apps = self._migrate(self.migrate_to)
+
+    def _migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def _migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('tracker', target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state([('tracker', target)]).apps
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class AccountMigrationTests(MigrationTestCase):
+    migrate_from = '0002_monthlysummary'
+    migrate_to = '0003_account'
+
+    def setUpBeforeMigration(self, apps):
+        apps.get_model('tracker', 'MonthlyEntry').objects.bulk_create([
+            apps.get_model('tracker', 'MonthlyEntry')(
+                date=month, bank_name='Bank', account_name='Moved', account_type=account_type, amount=Decimal('10.00'),
+            )
+            for month, account_type in [(date(2024, 1, 1), 'Savings'), (date(2024, 2, 1), 'Current')]
+        ])
+        apps.get_model('tracker', 'MonthlySummary').objects.create(
+            month=date(2024, 1, 1), savings_total=Decimal('10.00'), grand_total=Decimal('10.00'),
+        )
+
+    def test_summaries_follow_the_latest_type(self):
+        summary = self.apps.get_model('tracker', 'MonthlySummary').objects.get(month=date(2024, 1, 1))
+        self.assertEqual((summary.savings_total, summary.current_total), (Decimal('0.00'), Decimal('10.00')))
+
+
+class DedupeMigrationTests(MigrationTestCase):
+    migrate_from = '0003_account'
+    migrate_to = '0004_unique_month_account'
+
+    def setUpBeforeMigration(self, apps):
+        Account = apps.get_model('tracker', 'Account')
+        MonthlyEntry = apps.get_model('tracker', 'MonthlyEntry')
+        account = Account.objects.create(bank_name='Bank', account_name='Twice', account_type='Savings')
+        MonthlyEntry.objects.bulk_create([
+            MonthlyEntry(date=date(2024, 1, 1), account=account, amount=Decimal('10.00')),
+            MonthlyEntry(date=date(2024, 1, 15), account=account, amount=Decimal('25.00')),
+        ])
+        apps.get_model('tracker', 'MonthlySummary').objects.create(
+            month=date(2024, 1, 1), savings_total=Decimal('35.00'), grand_total=Decimal('35.00'),
+        )
+
+    def test_keeps_the_newest_entry_on_the_first_of_the_month(self):
+        entries = self.apps.get_model('tracker', 'MonthlyEntry').objects.values_list('date', 'amount')
+        self.assertEqual(list(entries), [(date(2024, 1, 1), Decimal('25.00'))])
+        summary = self.apps.get_model('tracker', 'MonthlySummary').objects.get(month=date(2024, 1, 1))
+        self.assertEqual((summary.savings_total, summary.grand_total), (Decimal('25.00'), Decimal('25.00')))
+
+
+class PenceMigrationTests(MigrationTestCase):
+    migrate_from = '0007_change_feed'
+    migrate_to = '0008_amounts_in_pence'
+
+    def setUpBeforeMigration(self, apps):
+        account = apps.get_model('tracker', 'Account').objects.create(
+            bank_name='Bank', account_name='Card', account_type='Credit Cards',
+        )
+        apps.get_model('tracker', 'MonthlyEntry').objects.create(
+            date=date(2024, 1, 1), account=account, amount=Decimal('-1234.57'),
+        )
+        apps.get_model('tracker', 'MonthlySummary').objects.create(
+            month=date(2024, 1, 1), credit_cards_total=Decimal('-1234.57'), grand_total=Decimal('1234.57'),
+        )
+
+    def test_scales_pounds_to_pence(self):
+        entry = self.apps.get_model('tracker', 'MonthlyEntry').objects.get()
+        self.assertEqual(entry.amount, Money(-123457))
+        summary = self.apps.get_model('tracker', 'MonthlySummary').objects.get()
+        self.assertEqual((summary.credit_cards_total, summary.grand_total), (Money(-123457), Money(123457)))
+
+    def test_reverses_to_pounds(self):
+        apps = self._migrate(self.migrate_from)
+        self.assertEqual(apps.get_model('tracker', 'MonthlyEntry').objects.get().amount, Decimal('-1234.57'))
+        summary = apps.get_model('tracker', 'MonthlySummary').objects.get()
+        self.assertEqual((summary.credit_cards_total, summary.grand_total), (Decimal('-1234.57'), Decimal('1234.57')))
+
+
+@test_settings
+class ViewQueryBudgetTests(TestCase):
+    """Every budgeted view stays within TRACKER_QUERY_BUDGETS from a cold cache.
+
+    Strict mode fails an over-budget request. Every write must also leave
+    the month summaries, and the totals it returns, matching the entries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.entry = MonthlyEntry.objects.select_related('account').order_by('date', 'id').first()
+        cls.month_entries = list(MonthlyEntry.objects.filter(date=cls.entry.date).values_list('id', flat=True))
+        # Distinct non-zero amounts, so a wrong delta shows in the totals
+        for n, entry_id in enumerate(cls.month_entries, 1):
+            MonthlyEntry.objects.filter(id=entry_id).update(amount=Money(n * 1001))
+        rebuild_summaries()
+        cls.entry.refresh_from_db()
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+
+    def assertWithinBudget(self, response, status=200):
+        self.assertEqual(response.status_code, status, response.content[:500])
+        self.assertIn('Server-Timing', response)
+        return response
+
+    def post_json(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def assertSummariesMatchEntries(self):
+        """Every month summary holds its entries' totals, and months without entries have none"""
+        entry_months = set(MonthlyEntry.objects.dates('date', 'month'))
+        self.assertEqual(set(MonthlySummary.objects.values_list('month', flat=True)), entry_months)
+        stored = {summary.month: summary_totals(summary) for summary in MonthlySummary.objects.all()}
+        self.assertEqual(stored, totals_for_months(entry_months))
+
+    def assertMonthTotals(self, totals, month):
+        self.assertEqual(totals, as_json_totals(month_totals(month)))
+
+    def test_entry_form(self):
+        self.assertWithinBudget(self.client.get('/'))
+
+    def test_month_history(self):
+        self.assertWithinBudget(self.client.get('/months/?page=1'))
+        self.assertWithinBudget(self.client.get(f"/months/?month={self.entry.date:%Y-%m}"))
+
+    def test_timeseries(self):
+        self.assertWithinBudget(self.client.get('/api/timeseries/?start=2000-01&end=2030-12'))
+
+    def test_update_amount(self):
+        response = self.assertWithinBudget(self.post_json(f"/update-amount/{self.entry.id}/", {'amount': '12.34'}))
+        data = response.json()
+        self.assertEqual(data['amount'], 12.34)
+        self.assertMonthTotals({key: data[key] for key in empty_totals()}, self.entry.date)
+        self.assertSummariesMatchEntries()
+
+    def test_update_amounts(self):
+        response = self.assertWithinBudget(self.post_json('/update-amounts/', {
+            'entries': [
+                {'id': entry_id, 'amount': f"{n}.25"} for n, entry_id in enumerate(self.month_entries)
+            ] + [{'id': self.entry.id, 'amount': '-7.00'}],
+        }))
+        data = response.json()
+        self.assertEqual(MonthlyEntry.objects.get(id=self.entry.id).amount, Money(-700))
+        self.assertEqual(list(data['months']), [get_month_key(self.entry.date)])
+        self.assertMonthTotals(data['months'][get_month_key(self.entry.date)], self.entry.date)
+        self.assertSummariesMatchEntries()
+
+    def test_add_account(self):
+        response = self.assertWithinBudget(self.post_json('/add-account/', {'accounts': [
+            {'bank_name': 'New Bank', 'account_name': f"Account {n}", 'account_type': 'Savings'} for n in range(3)
+        ]}), status=202)
+        self.assertEqual(response.json()['job']['status'], Job.DONE)
+
+    def test_update_account(self):
+        response = self.assertWithinBudget(self.post_json(f"/update-account/{self.entry.id}/", {
+            'bank_name': 'Renamed', 'account_name': 'Account',
+        }))
+        self.assertTrue(response.json()['success'])
+        self.assertSummariesMatchEntries()
+
+    def test_move_entry_to_another_account(self):
+        response = self.assertWithinBudget(self.post_json(f"/update-account/{self.entry.id}/", {
+            'bank_name': 'Renamed', 'account_name': 'Account', 'update_all_months': False,
+        }))
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(MonthlyEntry.objects.get(id=self.entry.id).account.bank_name, 'Renamed')
+        self.assertSummariesMatchEntries()
+
+    def test_merge_entry_into_an_existing_account(self):
+        target = MonthlyEntry.objects.filter(date=self.entry.date).exclude(account=self.entry.account).select_related('account').first()
+        response = self.assertWithinBudget(self.post_json(f"/update-account/{self.entry.id}/", {
+            'bank_name': target.account.bank_name, 'account_name': target.account.account_name,
+            'update_all_months': False,
+        }))
+        self.assertEqual(response.json()['id'], target.id)
+        self.assertEqual(MonthlyEntry.objects.get(id=target.id).amount, target.amount + self.entry.amount)
+        self.assertFalse(MonthlyEntry.objects.filter(id=self.entry.id).exists())
+        self.assertSummariesMatchEntries()
+
+    def test_delete_account(self):
+        response = self.assertWithinBudget(self.client.post(f"/delete-account/{self.entry.id}/?all_months=true"), status=202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], Job.DONE)
+        self.assertFalse(MonthlyEntry.objects.filter(account=self.entry.account_id).exists())
+        self.assertMonthTotals(job['result']['totals'], self.entry.date)
+        self.assertSummariesMatchEntries()
+
+    def test_delete_one_entry(self):
+        response = self.assertWithinBudget(self.client.post(f"/delete-account/{self.entry.id}/?all_months=false"))
+        self.assertFalse(MonthlyEntry.objects.filter(id=self.entry.id).exists())
+        self.assertMonthTotals(response.json()['totals'], self.entry.date)
+        self.assertSummariesMatchEntries()
+
+    def test_job_status(self):
+        job = self.post_json('/add-account/', {'accounts': [
+            {'bank_name': 'New Bank', 'account_name': 'Polled', 'account_type': 'Current'},
+        ]}).json()['job']
+        self.assertWithinBudget(self.client.get(f"/jobs/{job['id']}/"))
+
+    def test_changes(self):
+        cursor = latest_cursor()
+        self.post_json(f"/update-amount/{self.entry.id}/", {'amount': '5.00'})
+        response = self.assertWithinBudget(self.client.get(f"/changes/?since={cursor}"))
+        self.assertIn(get_month_key(self.entry.date), response.json()['months'])
+
+    def test_admin_changelist(self):
+        self.client.force_login(self.user)
+        self.assertWithinBudget(self.client.get('/admin/tracker/monthlyentry/'))
+        self.assertWithinBudget(self.client.get('/admin/tracker/monthlyentry/?q=bank'))
+
+    def test_streaming_timing_is_partial(self):
+        response = self.client.get('/changes/stream/')
+        list(response.streaming_content)
+        self.assertIn('(before streaming)', response['Server-Timing'])
+
+
+@test_settings
+class TimeseriesTests(TestCase):
+
+    def test_previous_skips_gaps_in_the_history(self):
+        account = Account.objects.first()
+        MonthlyEntry.objects.bulk_create([
+            MonthlyEntry(date=month, account=account, amount=Money(100)) for month in [date(2010, 1, 1), date(2012, 6, 1)]
+        ])
+        refresh_summaries([date(2010, 1, 1), date(2012, 6, 1)])
+
+        data = self.client.get('/api/timeseries/?start=2024-01&end=2024-12').json()
+        self.assertEqual((data['months'], data['previous']), ([], '2012-06'))
+        data = self.client.get('/api/timeseries/?start=2011-07&end=2012-06').json()
+        self.assertEqual(([month['month'] for month in data['months']], data['previous']), (['2012-06'], '2010-01'))
+        data = self.client.get('/api/timeseries/?start=2009-02&end=2010-01').json()
+        self.assertIsNone(data['previous'])
+
+
+@test_settings
+class CachedByMonthTests(TestCase):
+
+    months = [date(2024, 1, 1), date(2024, 2, 1)]
+
+    def setUp(self):
+        cache.clear()
+        self.loaded = []
+
+    def load(self):
+        def loader(months):
+            self.loaded.append(months)
+            return {month: f"{month:%m}:{len(self.loaded)}" for month in months}
+        return cached_by_month('test', self.months, loader)
+
+    def test_loads_only_the_months_that_miss(self):
+        self.assertEqual(self.load(), {date(2024, 1, 1): '01:1', date(2024, 2, 1): '02:1'})
+        self.assertEqual(self.load(), {date(2024, 1, 1): '01:1', date(2024, 2, 1): '02:1'})
+        self.assertEqual(self.loaded, [self.months])
+
+    def test_bump_months_invalidates_those_months_on_commit(self):
+        self.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_months([date(2024, 2, 15)])
+            # Not before the write commits
+            self.assertEqual(self.load()[date(2024, 2, 1)], '02:1')
+        self.assertEqual(self.load(), {date(2024, 1, 1): '01:1', date(2024, 2, 1): '02:2'})
+        self.assertEqual(self.loaded[-1], [date(2024, 2, 1)])
+
+    def test_bump_all_invalidates_every_month(self):
+        self.load()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_all()
+        self.assertEqual(self.load(), {date(2024, 1, 1): '01:2', date(2024, 2, 1): '02:2'})
+
+
+@test_settings
+class SummaryRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.exclude(account_type='Credit Cards').first()
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_new_month_reaches_the_cached_month_lists(self):
+        # Prime the generation-keyed caches before the month exists
+        self.assertNotContains(self.client.get('/'), 'Load earlier months')
+        self.assertEqual(self.client.get('/months/?page=1').json()['months'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/tracker/monthlyentry/add/', {
+                'date': '2020-05-01', 'account': self.account.id, 'amount': '12.50', 'notes': '',
+            })
+        self.assertEqual(response.status_code, 302)
+
+        self.assertContains(self.client.get('/'), 'Load earlier months')
+        self.assertEqual(self.client.get('/months/?page=1').json()['months'], ['May 2020'])
+        self.assertEqual(MonthlySummary.objects.get(month=date(2020, 5, 1)).grand_total, Money(1250))
+
+
+@test_settings
+class ImportTests(TestCase):
+
+    header = 'date,bank_name,account_name,account_type,amount,notes'
+
+    def import_csv(self, *rows, **kwargs):
+        return import_entries(io.StringIO('\n'.join([self.header, *rows]) + '\n'), **kwargs)
+
+    def assertSummaryMatches(self, month):
+        stored = summary_totals(MonthlySummary.objects.get(month=month))
+        self.assertEqual(stored, aggregate_totals(MonthlyEntry.objects.filter(date=month)))
+
+    def test_upserts_on_month_and_account(self):
+        existing = MonthlyEntry.objects.select_related('account').order_by('date', 'id').first()
+        account = existing.account
+        report = self.import_csv(
+            f"{existing.date:%Y-%m-%d},{account.bank_name},{account.account_name},{account.account_type},10.00,first",
+            f"{existing.date:%Y-%m},{account.bank_name},{account.account_name},{account.account_type},12.50,second",
+            '2019-03,New Bank,New Account,Savings,"1,000.01",',
+        )
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.amount, existing.notes), (Money(1250), 'second'))
+        self.assertEqual(MonthlyEntry.objects.get(date=date(2019, 3, 1)).amount, Money(100001))
+        self.assertEqual(
+            {key: report[key] for key in ('rows', 'upserted', 'skipped', 'errors', 'months')},
+            {'rows': 3, 'upserted': 2, 'skipped': 0, 'errors': [], 'months': 2},
+        )
+        self.assertSummaryMatches(existing.date)
+        self.assertSummaryMatches(date(2019, 3, 1))
+
+    def test_skips_and_reports_bad_rows(self):
+        account = Account.objects.first()
+        other_type = next(choice for choice, _ in MonthlyEntry.ACCOUNT_TYPE_CHOICES if choice != account.account_type)
+        report = self.import_csv(
+            f"2019-01,{account.bank_name},{account.account_name},{other_type},1.00,",
+            '2019-01,New Bank,Card,Credit Cards,2.00,',
+            '2019-02,New Bank,Card,Savings,3.00,',
+            '2019-01,New Bank,Huge,Savings,99999999999999999,',
+            '2019-13,New Bank,Card,Credit Cards,4.00,',
+            '2019-01,New Bank,Card,Crypto,5.00,',
+        )
+
+        self.assertEqual((report['rows'], report['upserted'], report['skipped']), (6, 1, 5))
+        self.assertEqual([error.split(':')[0] for error in report['errors']], ['line 5', 'line 6', 'line 7', 'line 2', 'line 4'])
+        self.assertIn("doesn't match", report['errors'][-1])
+        self.assertEqual(Account.objects.get(bank_name='New Bank', account_name='Card').account_type, 'Credit Cards')
+        self.assertFalse(MonthlyEntry.objects.filter(date=date(2019, 2, 1)).exists())
+        self.assertSummaryMatches(date(2019, 1, 1))
+
+    def test_committed_batches_keep_their_summaries_when_a_later_one_fails(self):
+        from . import importing
+        upsert_batch = importing._upsert_batch
+        calls = []
+
+        def fail_second_batch(rows, accounts):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError('database is locked')
+            return upsert_batch(rows, accounts)
+
+        with mock.patch.object(importing, '_upsert_batch', fail_second_batch), self.assertRaises(RuntimeError):
+            self.import_csv('2019-01,New Bank,Saver,Savings,5.00,', '2019-02,New Bank,Saver,Savings,6.00,', batch_size=1)
+
+        self.assertSummaryMatches(date(2019, 1, 1))
+        self.assertFalse(MonthlySummary.objects.filter(month=date(2019, 2, 1)).exists())
+
+
+@test_settings
+class ProvisioningTests(TestCase):
+
+    def entries(self, month):
+        return dict(MonthlyEntry.objects.filter(date=month).values_list('account__account_name', 'amount'))
+
+    def test_gaps_copy_the_most_recent_earlier_month(self):
+        first, second = Account.objects.filter(account_type='Savings')[:2]
+        MonthlyEntry.objects.bulk_create([
+            MonthlyEntry(date=date(2020, 1, 1), account=first, amount=Money(100)),
+            MonthlyEntry(date=date(2020, 4, 1), account=second, amount=Money(200)),
+        ])
+
+        created = provision_years(2020, 2020)
+
+        self.assertEqual(created, [date(2020, month, 1) for month in (2, 3, *range(5, 13))])
+        for month in (1, 2, 3):
+            self.assertEqual(self.entries(date(2020, month, 1)), {first.account_name: Money(100)})
+        for month in range(4, 13):
+            self.assertEqual(self.entries(date(2020, month, 1)), {second.account_name: Money(200)})
+        self.assertEqual(MonthlySummary.objects.get(month=date(2020, 12, 1)).savings_total, Money(200))
+        self.assertEqual(provision_years(2020, 2020), [])
+
+    def test_months_without_history_start_from_the_base_accounts(self):
+        self.assertEqual(len(provision_years(2018, 2019)), 24)
+        self.assertEqual(MonthlyEntry.objects.filter(date=date(2018, 1, 1)).count(), len(BASE_ACCOUNTS))
+        self.assertEqual(MonthlyEntry.objects.filter(date=date(2019, 12, 1)).count(), len(BASE_ACCOUNTS))
+        self.assertTrue(MonthlySummary.objects.filter(month=date(2019, 12, 1)).exists())
+
+    def test_generate_year_data_is_idempotent(self):
+        self.assertEqual(generate_year_data(2025), [])
+        with self.assertRaises(ValueError):
+            provision_years(2021, 2020)
+
+    def test_add_accounts_is_idempotent(self):
+        months = MonthlyEntry.objects.dates('date', 'month').count()
+        summaries = {summary.month: summary_totals(summary) for summary in MonthlySummary.objects.all()}
+        existing = Account.objects.first()
+        accounts = [
+            {'bank_name': 'New Bank', 'account_name': 'Saver', 'account_type': 'Savings'},
+            {'bank_name': existing.bank_name, 'account_name': existing.account_name, 'account_type': 'Pensions'},
+        ]
+        progress = []
+
+        self.assertEqual(add_accounts(accounts, progress=lambda done, total: progress.append((done, total))), months)
+        self.assertEqual(progress[-1], (months, months))
+        self.assertEqual(add_accounts(accounts), 0)
+        self.assertEqual(Account.objects.filter(bank_name='New Bank').count(), 1)
+        existing.refresh_from_db()
+        self.assertNotEqual(existing.account_type, 'Pensions')
+        self.assertEqual({summary.month: summary_totals(summary) for summary in MonthlySummary.objects.all()}, summaries)
+
+
+@test_settings
+class ChangeFeedTests(TestCase):
+    """Cursors never pass a gap in the log ids (a write that may still commit) until it has settled"""
+
+    month = date(2025, 1, 1)
+
+    def setUp(self):
+        ChangeLog.objects.all().delete()
+
+    def log(self, change_id, age_seconds=0, months=(month,)):
+        ChangeLog.objects.create(id=change_id, months=None if months is None else [month.isoformat() for month in months])
+        ChangeLog.objects.filter(id=change_id).update(created_at=timezone.now() - timedelta(seconds=age_seconds))
+
+    @property
+    def settled(self):
+        return RESEND_OVERLAP.total_seconds() + 60
+
+    def test_latest_cursor_of_an_empty_log(self):
+        self.assertEqual(latest_cursor(), 0)
+
+    def test_latest_cursor_stops_before_a_recent_gap(self):
+        for change_id in (1, 2):
+            self.log(change_id, self.settled)
+        self.log(3)
+        self.log(5)
+        self.assertEqual(latest_cursor(), 3)
+
+    def test_latest_cursor_passes_a_settled_gap(self):
+        self.log(1, self.settled)
+        self.log(3, self.settled)
+        self.log(4)
+        self.assertEqual(latest_cursor(), 4)
+
+    def test_latest_cursor_when_nothing_has_settled(self):
+        for change_id in (10, 11, 13):
+            self.log(change_id)
+        self.assertEqual(latest_cursor(), 11)
+
+    def test_changes_since_stops_before_a_recent_gap(self):
+        self.log(1, self.settled)
+        self.log(2)
+        self.log(4)
+        feed = changes_since(1)
+        self.assertEqual((feed['cursor'], feed['reload']), (2, False))
+        self.assertIn(get_month_key(self.month), feed['months'])
+        # Once the gap settles the cursor moves on
+        ChangeLog.objects.filter(id=4).update(created_at=timezone.now() - timedelta(seconds=self.settled))
+        self.assertEqual(changes_since(2)['cursor'], 4)
+
+    def test_changes_since_sends_month_totals_and_entries(self):
+        entry = MonthlyEntry.objects.filter(date=self.month).first()
+        self.log(1, self.settled)
+        self.log(2)
+        feed = changes_since(1)
+        month = feed['months'][get_month_key(self.month)]
+        self.assertEqual(month['totals'], as_json_totals(month_totals(self.month)))
+        self.assertIn(entry.id, month['entry_ids'])
+
+    def test_changes_since_reloads_after_a_change_to_every_month(self):
+        self.log(1, self.settled)
+        self.log(2, months=None)
+        self.assertEqual(changes_since(1), {'cursor': 2, 'reload': True, 'months': {}})
+
+    def test_changes_since_reloads_a_trimmed_cursor(self):
+        self.log(5, self.settled)
+        self.log(6)
+        self.assertEqual(changes_since(1), {'cursor': 6, 'reload': True, 'months': {}})
+        self.assertTrue(changes_since(4)['months'])
+
+
+@test_settings
+class JobTests(TestCase):
+
+    def setUp(self):
+        self.addCleanup(jobs._submitted.clear)
+
+    def queue(self, age_seconds=0, **fields):
+        job = Job.objects.create(kind='add_accounts', params={'accounts': [
+            {'bank_name': 'Job Bank', 'account_name': 'Saver', 'account_type': 'Savings'},
+        ]}, **fields)
+        Job.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(seconds=age_seconds))
+        job.refresh_from_db()
+        return job
+
+    def test_run_job_claims_a_job_once(self):
+        job = self.queue()
+        self.assertTrue(jobs.run_job(job.id))
+        self.assertFalse(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNotNone(job.finished_at)
+        self.assertTrue(Account.objects.filter(bank_name='Job Bank').exists())
+
+    def test_run_job_records_a_failure(self):
+        job = Job.objects.create(kind='move_account', params={'account_id': 0, 'target_id': 0, 'month': '2025-01-01'})
+        with self.assertLogs('tracker.jobs', 'ERROR'):
+            self.assertTrue(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertTrue(job.error)
+
+    def test_requeue_stale_jobs(self):
+        stale = timezone.now() - timedelta(seconds=settings.TRACKER_JOB_STALE_SECONDS + 1)
+        silent = self.queue(status=Job.RUNNING, started_at=stale, heartbeat_at=stale)
+        never_beat = self.queue(status=Job.RUNNING, started_at=stale)
+        alive = self.queue(status=Job.RUNNING, started_at=stale, heartbeat_at=timezone.now())
+
+        with self.assertLogs('tracker.jobs', 'WARNING'):
+            self.assertEqual(jobs.requeue_stale_jobs(), 2)
+        statuses = dict(Job.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[job.id] for job in (silent, never_beat, alive)], [Job.QUEUED, Job.QUEUED, Job.RUNNING],
+        )
+        self.assertFalse(Job.objects.filter(id=silent.id, started_at__isnull=False).exists())
+
+    @override_settings(TRACKER_JOBS_EAGER=False)
+    def test_polling_hands_a_waiting_job_to_the_pool_once(self):
+        job = self.queue(age_seconds=settings.TRACKER_JOB_STALE_SECONDS + 1)
+        executor = mock.Mock()
+        with mock.patch.object(jobs, '_get_executor', return_value=executor):
+            for _ in range(3):
+                self.assertEqual(self.client.get(f"/jobs/{job.id}/").json()['status'], Job.QUEUED)
+            self.assertEqual(executor.submit.call_args_list, [mock.call(jobs._run_in_thread, job.id)])
+
+            # Once run, a job requeued later can be submitted again
+            with mock.patch.object(jobs.connections, 'close_all'):
+                jobs._run_in_thread(job.id)
+            Job.objects.filter(id=job.id).update(status=Job.QUEUED)
+            self.client.get(f"/jobs/{job.id}/")
+            self.assertEqual(executor.submit.call_count, 2)
+
+    @override_settings(TRACKER_JOBS_EAGER=False)
+    def test_polling_leaves_a_recent_job_to_its_own_pool(self):
+        job = self.queue()
+        with mock.patch.object(jobs, '_get_executor') as get_executor:
+            self.client.get(f"/jobs/{job.id}/")
+        get_executor.assert_not_called()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'the estimate is SQLite specific')
+@test_settings
+class EstimatedCountPaginatorTests(TestCase):
+
+    def setUp(self):
+        # Ids are never reused, so the new rows start well above 1
+        account = Account.objects.first()
+        MonthlyEntry.objects.all().delete()
+        MonthlyEntry.objects.bulk_create([
+            MonthlyEntry(date=date(2000 + n // 12, n % 12 + 1, 1), account=account, amount=Money(n)) for n in range(20)
+        ])
+
+    def count(self, queryset=None):
+        return tracker_admin.EstimatedCountPaginator(MonthlyEntry.objects.all() if queryset is None else queryset, 10).count
+
+    def test_small_tables_are_counted_exactly(self):
+        self.assertGreater(MonthlyEntry.objects.aggregate(last=Max('pk'))['last'], 20)
+        self.assertEqual(self.count(), 20)
+
+    def test_large_tables_are_sized_from_the_id_span(self):
+        MonthlyEntry.objects.filter(pk=MonthlyEntry.objects.order_by('pk')[5].pk).delete()
+        with mock.patch.object(tracker_admin, 'EXACT_COUNT_LIMIT', 5):
+            self.assertEqual(self.count(), 20)
+            self.assertEqual(self.count(MonthlyEntry.objects.filter(date__year=2000)), 11)
+
+    def test_large_tables_are_sized_from_analyze(self):
+        MonthlyEntry.objects.filter(date__year=2000, date__month__range=(6, 10)).delete()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        with mock.patch.object(tracker_admin, 'EXACT_COUNT_LIMIT', 5):
+            self.assertEqual(self.count(), 15)
@@ -4,8 +4,18 @@ from . import views
 urlpatterns = [
     path('', views.entry_form, name='entry_form'),
     path('update-amount/<int:entry_id>/', views.update_amount, name='update_amount'),
+    path('update-amounts/', views.update_amounts, name='update_amounts'),
     path('add-account/', views.add_account, name='add_account'),
+    path('import/', views.import_data, name='import_data'),
+    path('export/entries.<str:export_format>', views.export_entries, name='export_entries'),
     path('reset-data/', views.reset_data, name='reset_data'),
+    path('months/', views.month_history, name='month_history'),
+    path('api/timeseries/', views.timeseries, name='timeseries'),
+    path('api/net-worth/', views.net_worth, name='net_worth'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('jobs/<int:job_id>/', views.job_detail, name='job_status'),
+    path('changes/', views.changes, name='changes'),
+    path('changes/stream/', views.change_stream, name='change_stream'),
     
     # New URL patterns for account management
     path('update-account/<int:entry_id>/', views.update_account, name='update_account'),
@@ -1,57 +1,48 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
-from .models import MonthlyEntry
-from datetime import date
+from asgiref.sync import sync_to_async
+from django.shortcuts import redirect, aget_object_or_404, get_object_or_404
+from django.template.response import TemplateResponse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from .models import Account, Job, MonthlyEntry, MonthlySummary
+from datetime import date, datetime
+import asyncio
+import hashlib
+import io
 import calendar
-from decimal import Decimal
+import time
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
 import json
 from django.db.models import Sum, Q
-from typing import Dict, List, Tuple, Any, Optional
-
-
-# Constants
-BASE_ACCOUNTS = [
-    {'bank': 'Barclays', 'account': 'Main Account', 'type': 'Current', 'amount': 0},
-    {'bank': 'Barclays', 'account': 'Joint Account', 'type': 'Current', 'amount': 0},
-    {'bank': 'Lloyds', 'account': 'Credit Card', 'type': 'Current', 'amount': 0},
-    {'bank': 'HSBC', 'account': 'Flex Account', 'type': 'Current', 'amount': 0},
-    {'bank': 'Barclays', 'account': 'Rainy Day', 'type': 'Savings', 'amount': 0},
-    {'bank': 'Barclays', 'account': 'ISA', 'type': 'Savings', 'amount': 0},
-    {'bank': 'Lloyds', 'account': 'Easy Saver', 'type': 'Savings', 'amount': 0},
-    {'bank': 'Family', 'account': 'Personal Loan', 'type': 'Lending', 'amount': 0},
-    {'bank': 'Deanston Building', 'account': 'Deposit till Apr 26', 'type': 'Deposits', 'amount': 0},
-    {'bank': 'RetireReady', 'account': 'Pension Fund', 'type': 'Pensions', 'amount': 0},
-    {'bank': 'Lloyds Cashback', 'account': 'Credit Card', 'type': 'Credit Cards', 'amount': 0},
-    {'bank': 'Barclaycard', 'account': 'Credit Card', 'type': 'Credit Cards', 'amount': 0},
-]
-
-ACCOUNT_TYPES = ['Current', 'Savings', 'Lending', 'Deposits', 'Pensions', 'Credit Cards']
-DEFAULT_YEAR = 2025
+from django.db.models.functions import TruncMonth
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+from django.utils import timezone
+from .aggregation import (
+    ACCOUNT_TYPE_KEYS, aggregate_totals, apply_amount_change, apply_amount_changes, as_json_totals, empty_totals,
+    next_month, refresh_summaries, summary_totals,
+)
+from .analytics import as_json_point, net_worth_point, net_worth_series
+from .caching import bump_all, cached_by_generation, cached_by_month, data_version
+from .changes import changes_since, latest_cursor
+from .exporting import export_rows, iter_csv, iter_ndjson
+from .importing import ImportFileError, import_entries
+from .instrumentation import template_timer, view_stats
+from .jobs import enqueue, job_status, revive_job
+from .maintenance import move_entries
+from .money import Money
+from .provisioning import BASE_ACCOUNTS, DEFAULT_YEAR
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Any, Optional
 
 
 # Helper functions
 def calculate_totals(entries_queryset) -> Dict[str, float]:
     """Calculate totals for all account types from a queryset"""
-    totals = {}
-    
-    # Calculate totals for each account type
-    for account_type in ACCOUNT_TYPES:
-        type_total = sum(e.amount for e in entries_queryset.filter(account_type=account_type))
-        totals[f"{account_type.lower().replace(' ', '_')}_total"] = float(type_total)
-    
-    # Calculate grand total (credit cards are liabilities so subtract them)
-    grand_total = (
-        totals.get('current_total', 0) + 
-        totals.get('savings_total', 0) + 
-        totals.get('lending_total', 0) + 
-        totals.get('deposits_total', 0) + 
-        totals.get('pensions_total', 0) - 
-        totals.get('credit_cards_total', 0)
-    )
-    totals['grand_total'] = float(grand_total)
-    
-    return totals
+    # One grouped integer SUM query; totals stay Money until the JSON boundary
+    return as_json_totals(aggregate_totals(entries_queryset))
 
 
 def get_month_key(month_date: date) -> str:
@@ -59,182 +50,465 @@ def get_month_key(month_date: date) -> str:
     return f"{calendar.month_name[month_date.month]} {month_date.year}"
 
 
-def group_entries_by_month(entries_queryset) -> Dict[str, Dict]:
-    """Group entries by month and account type"""
+class EntryRow(NamedTuple):
+    """Compact, cacheable entry row with just the fields the month templates read"""
+    id: int
+    bank_name: str
+    account_name: str
+    amount: Money
+    notes: str
+
+
+ENTRY_ROW_FIELDS = ('id', 'account__bank_name', 'account__account_name', 'amount', 'notes')
+
+
+def group_entries_by_month(entries_queryset) -> Dict[date, Dict]:
+    """Group entries by month and account type.
+
+    Months are bucketed by the database (TruncMonth) and rows come back as
+    plain tuples, so no model instances are built.
+    """
     entries_by_month = {}
+    rows = entries_queryset.annotate(month=TruncMonth('date')).values_list(
+        'month', 'account__account_type', *ENTRY_ROW_FIELDS
+    )
     
-    for entry in entries_queryset:
-        month_date = entry.date.replace(day=1)
-        month_key = get_month_key(month_date)
-        
-        if month_key not in entries_by_month:
-            entries_by_month[month_key] = {
+    for month_date, account_type, *row in rows:
+        month_data = entries_by_month.get(month_date)
+        if month_data is None:
+            month_data = entries_by_month[month_date] = {
                 'month_date': month_date,
-                **{account_type.lower().replace(' ', '_'): [] for account_type in ACCOUNT_TYPES}
+                **{key: [] for key in ACCOUNT_TYPE_KEYS.values()}
             }
         
         # Add entry to appropriate list based on account type
-        account_type_key = entry.account_type.lower().replace(' ', '_')
-        if account_type_key in entries_by_month[month_key]:
-            entries_by_month[month_key][account_type_key].append(entry)
+        account_type_key = ACCOUNT_TYPE_KEYS.get(account_type)
+        if account_type_key is not None:
+            month_data[account_type_key].append(EntryRow(*row))
     
     return entries_by_month
 
 
-def create_entries_for_month(month_date: date, template_entries=None) -> None:
-    """Create entries for a specific month based on template or BASE_ACCOUNTS"""
-    if template_entries:
-        # Copy from template entries
-        for entry in template_entries:
-            MonthlyEntry.objects.create(
-                date=month_date,
-                bank_name=entry.bank_name,
-                account_name=entry.account_name,
-                account_type=entry.account_type,
-                amount=entry.amount,
-                notes=""
-            )
-    else:
-        # Create from BASE_ACCOUNTS template
-        for account in BASE_ACCOUNTS:
-            MonthlyEntry.objects.create(
-                date=month_date,
-                bank_name=account['bank'],
-                account_name=account['account'],
-                account_type=account['type'],
-                amount=account['amount'],
-                notes=""
-            )
+def _summary_data(summary: MonthlySummary) -> Dict[str, Any]:
+    """Cacheable month totals, as read by the month cards, from a summary row"""
+    return {'month': summary.month, 'updated_at': summary.updated_at, **summary_totals(summary)}
 
 
-# Data management functions
-def generate_year_data(year: int = DEFAULT_YEAR) -> None:
-    """Generate test data for all months of specified year if they don't exist"""
-    # Check if data for January exists (as a test for any data)
-    if MonthlyEntry.objects.filter(date__year=year).exists():
-        # Some data exists, make sure all months are covered
-        ensure_all_months_exist(year)
-        return
+def _load_summaries(months: List[date]) -> Dict[date, Dict[str, Any]]:
+    return {summary.month: _summary_data(summary) for summary in MonthlySummary.objects.filter(month__in=months)}
 
-    # Generate account data for each month
-    for month in range(1, 13):
-        month_date = date(year, month, 1)
-        create_entries_for_month(month_date)
 
+def _load_month_groups(months: List[date]) -> Dict[date, Dict]:
+    entries = MonthlyEntry.objects.filter(
+        date__gte=min(months),
+        date__lt=next_month(max(months))
+    ).order_by('date', 'account__bank_name', 'account__account_name')
+    
+    # Group entries by month
+    entries_by_month = {
+        month: month_data for month, month_data in group_entries_by_month(entries).items()
+        if month in months
+    }
+
+    # Attach the precomputed month totals used by the month cards
+    summaries = _load_summaries(list(entries_by_month))
+    missing_months = [month for month in entries_by_month if month not in summaries]
+    if missing_months:
+        refresh_summaries(missing_months)
+        summaries.update(_load_summaries(missing_months))
+    for month, month_data in entries_by_month.items():
+        month_data['summary'] = summaries.get(month)
 
-def ensure_all_months_exist(year: int = DEFAULT_YEAR) -> None:
-    """Make sure all months of the specified year have data"""
-    for month in range(1, 13):
-        month_date = date(year, month, 1)
-        
-        # Check if any data exists for this month
-        if not MonthlyEntry.objects.filter(date__year=year, date__month=month).exists():
-            # No data for this month, copy from the most recent previous month
-            copy_from_previous_month(month_date)
+    return entries_by_month
 
 
-def copy_from_previous_month(target_date: date) -> None:
-    """Copy entries from the most recent previous month to the target month"""
-    # Find the most recent month before target_date that has entries
-    existing_months = MonthlyEntry.objects.filter(date__lt=target_date).dates('date', 'month', order='DESC')
-    
-    if existing_months:
-        prev_month_date = existing_months[0]
-        prev_entries = MonthlyEntry.objects.filter(
-            date__year=prev_month_date.year, 
-            date__month=prev_month_date.month
-        )
-        create_entries_for_month(target_date, prev_entries)
-    else:
-        # No previous months exist, create default template
-        create_entries_for_month(target_date)
+def month_groups(months: Iterable[date]) -> Dict[str, Dict]:
+    """Grouped entries, with their month summary attached, keyed by month name (cached per month)"""
+    groups = cached_by_month('month-groups', months, _load_month_groups)
+    return {get_month_key(month): month_data for month, month_data in groups.items() if month_data is not None}
+
+
+def month_summaries(months: Iterable[date]) -> Dict[date, Dict[str, Any]]:
+    """Summary totals of the given months that have data (cached per month)"""
+    summaries = cached_by_month('month-summary', months, _load_summaries)
+    return {month: summary for month, summary in summaries.items() if summary is not None}
+
+
+async def asummary_months_totals(months: Iterable[date]) -> Dict[date, Dict[str, float]]:
+    """JSON totals for each month, read from the summary rows in one query.
+
+    Write endpoints use this rather than the cache, whose versions are only
+    bumped once their transaction commits.
+    """
+    months = {month.replace(day=1) for month in months}
+    summaries = {
+        summary.month: _summary_data(summary)
+        async for summary in MonthlySummary.objects.filter(month__in=months)
+    }
+    return {
+        month: as_json_totals({key: summaries.get(month, {}).get(key, value) for key, value in empty_totals().items()})
+        for month in sorted(months)
+    }
+
+
+async def asummary_month_totals(month_date: date) -> Dict[str, float]:
+    """JSON totals for the month containing month_date, read from its summary row"""
+    return (await asummary_months_totals([month_date]))[month_date.replace(day=1)]
+
+
+def sort_months(entries_by_month: Dict[str, Dict]) -> List[Tuple[str, Dict]]:
+    """Month groups newest first, as rendered in the hidden month blocks"""
+    return sorted(entries_by_month.items(), key=lambda x: x[1]['month_date'], reverse=True)
+
+
+def parse_month(value: str) -> date:
+    """Parse a 'YYYY-MM' query parameter into a first-of-month date"""
+    month_date = datetime.strptime(value, '%Y-%m').date()
+    # Month ranges end at the next month's first day, which 9999-12 doesn't have
+    if month_date == date.max.replace(day=1):
+        raise ValueError(f"month {value!r} is out of range")
+    return month_date
+
+
+def parse_month_range(request, default_start: Optional[date] = None, default_end: Optional[date] = None):
+    """Inclusive (start, end) months from ?start=YYYY-MM&end=YYYY-MM; ValueError if invalid or reversed"""
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    try:
+        start = parse_month(start) if start else default_start
+        end = parse_month(end) if end else default_end
+    except ValueError:
+        raise ValueError('start and end must be YYYY-MM')
+    if start and end and start > end:
+        raise ValueError('start must not be after end')
+    return start, end
 
 
 # View functions
 def entry_form(request):
     """Main view for displaying and managing entries"""
-    # Generate data for all months of DEFAULT_YEAR
-    generate_year_data()
-    
-    # Get all entries ordered by date, bank, and account name
-    entries = MonthlyEntry.objects.all().order_by('date', 'bank_name', 'account_name')
-    
-    # Group entries by month
-    entries_by_month = group_entries_by_month(entries)
+    # Read before the data, so edits made while the page renders are still sent to it
+    change_cursor = latest_cursor()
+    # Months are provisioned by migrate/provision_months, not on page load.
+    # The month cards only need the dashboard year's summary rows; entries are
+    # loaded for the current month's detail view, other months on demand.
+    window_start = date(DEFAULT_YEAR, 1, 1)
+    summaries = month_summaries(date(DEFAULT_YEAR, month, 1) for month in range(1, 13))
     
     # Current month and year
     today = date.today()
     current_month = today.month
     
     # Prepare data for current year months to show in horizontal scroller
-    current_year_months = []
-    for month in range(1, 13):
-        month_date = date(DEFAULT_YEAR, month, 1)
-        month_key = get_month_key(month_date)
-        
-        if month_key in entries_by_month:
-            month_data = entries_by_month[month_key]
-            
-            # Create a copy with the current month flag
-            month_data_copy = month_data.copy()
-            month_data_copy['is_current'] = (month == current_month)
-            
-            current_year_months.append((month_key, month_data_copy))
-    
-    # Sort months chronologically
-    current_year_months.sort(key=lambda x: x[1]['month_date'].month)
-    
-    # Get the complete list of all data (for chart and hidden data)
-    sorted_months = sorted(
-        entries_by_month.items(), 
-        key=lambda x: x[1]['month_date'],
-        reverse=True
-    )
+    current_year_months = [
+        (get_month_key(month_date), {
+            'month_date': month_date,
+            'summary': summary,
+            'is_current': month_date.month == current_month,
+        })
+        for month_date, summary in sorted(summaries.items())
+    ]
     
-    # Get current month's data
+    # Get current month's entries for the detail view
     current_month_key = get_month_key(today)
-    current_month_data = next(
-        (data for _, data in current_year_months if get_month_key(data['month_date']) == current_month_key),
-        None
-    )
+    current_month_data = None
+    if any(month_key == current_month_key for month_key, _ in current_year_months):
+        current_month_data = month_groups([today.replace(day=1)]).get(current_month_key)
 
-    # Calculate total assets for display
+    # Calculate total assets for display, with its trend
     total_assets = 0
-    if current_month_data:
-        entries = MonthlyEntry.objects.filter(
-            date__year=today.year,
-            date__month=today.month
-        )
-        total_assets = calculate_totals(entries)['grand_total']
+    net_worth_trend = None
+    if current_month_data and current_month_data['summary']:
+        total_assets = current_month_data['summary']['grand_total']
+        net_worth_trend = net_worth_point(today)
+
+    has_older_months = cached_by_generation(
+        f"has-older-months:{DEFAULT_YEAR}",
+        MonthlySummary.objects.filter(month__lt=window_start).exists
+    )
 
-    return render(request, 'tracker/entry_form.html', {
-        'entries_by_month': sorted_months,
+    return TemplateResponse(request, 'tracker/entry_form.html', {
         'current_year_months': current_year_months,
         'total_assets': total_assets,
+        'net_worth_trend': net_worth_trend,
         'month_data': current_month_data,
+        'has_older_months': has_older_months,
+        'dashboard_year': DEFAULT_YEAR,
+        'change_cursor': change_cursor,
+        # Only an ASGI server can hold streams open without a worker each
+        'change_stream': isinstance(request, ASGIRequest),
+    })
+
+
+def month_history(request):
+    """AJAX endpoint returning rendered month blocks.
+
+    ?month=YYYY-MM returns that single month; otherwise ?page=N returns a
+    page of the months before the dashboard window, newest first.
+    """
+    if request.GET.get('month'):
+        try:
+            month_date = parse_month(request.GET['month'])
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'month must be YYYY-MM'}, status=400)
+        page = None
+        entries_by_month = month_groups([month_date])
+    else:
+        older_months = cached_by_generation(f"older-months:{DEFAULT_YEAR}", lambda: list(
+            MonthlySummary.objects.filter(
+                month__lt=date(DEFAULT_YEAR, 1, 1)
+            ).order_by('-month').values_list('month', flat=True)
+        ))
+        page = Paginator(older_months, settings.TRACKER_MONTHS_PAGE_SIZE).get_page(request.GET.get('page'))
+        entries_by_month = month_groups(page)
+
+    sorted_months = sort_months(entries_by_month)
+    with template_timer():
+        html = render_to_string('tracker/month_list.html', {'entries_by_month': sorted_months}, request=request)
+
+    return JsonResponse({
+        'success': True,
+        'page': page.number if page else None,
+        'has_next': page.has_next() if page else False,
+        'months': [month_key for month_key, _ in sorted_months],
+        'html': html,
+    })
+
+
+# Longest range /api/timeseries/ serves, in months
+TIMESERIES_MAX_MONTHS = 600
+
+
+def _timeseries_range(request) -> Tuple[date, date]:
+    """Inclusive (start, end) months from ?start=YYYY-MM&end=YYYY-MM, defaulting to the dashboard year"""
+    start, end = parse_month_range(request, date(DEFAULT_YEAR, 1, 1), date(DEFAULT_YEAR, 12, 1))
+    if (end.year - start.year) * 12 + end.month - start.month >= TIMESERIES_MAX_MONTHS:
+        raise ValueError(f"the range can span at most {TIMESERIES_MAX_MONTHS} months")
+    return start, end
+
+
+def _timeseries_summaries(request) -> Optional[Dict[date, Dict[str, Any]]]:
+    """Cached summaries of the months in range, looked up once per request"""
+    if not hasattr(request, '_timeseries_summaries'):
+        try:
+            start, end = _timeseries_range(request)
+        except ValueError:
+            request._timeseries_summaries = None
+        else:
+            # Only months that have data, read off the summaries' unique month index
+            months = MonthlySummary.objects.filter(month__gte=start, month__lte=end).values_list('month', flat=True)
+            request._timeseries_summaries = month_summaries(list(months))
+    return request._timeseries_summaries
+
+
+def _timeseries_previous(request) -> Optional[date]:
+    """Newest month with data before the range, so the chart can page back over gaps"""
+    if not hasattr(request, '_timeseries_previous'):
+        start, _ = _timeseries_range(request)
+        request._timeseries_previous = (
+            MonthlySummary.objects.filter(month__lt=start).order_by('-month').values_list('month', flat=True).first()
+        )
+    return request._timeseries_previous
+
+
+def _timeseries_etag(request) -> Optional[str]:
+    summaries = _timeseries_summaries(request)
+    if summaries is None:
+        return None
+    start, end = _timeseries_range(request)
+    versions = ','.join(f"{month}={summary['updated_at'].isoformat()}" for month, summary in sorted(summaries.items()))
+    return hashlib.md5(f"{start}:{end}:{versions}:{_timeseries_previous(request)}".encode()).hexdigest()
+
+
+def _timeseries_last_modified(request):
+    summaries = _timeseries_summaries(request)
+    return max((summary['updated_at'] for summary in summaries.values()), default=None) if summaries else None
+
+
+@require_GET
+@cache_control(max_age=0, must_revalidate=True)
+@condition(etag_func=_timeseries_etag, last_modified_func=_timeseries_last_modified)
+def timeseries(request):
+    """JSON per-month, per-type totals and net worth for a range of months (chart data).
+
+    'previous' is the newest earlier month with data (or null), where the
+    next page of history ends.
+    """
+    try:
+        start, end = _timeseries_range(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    summaries = _timeseries_summaries(request)
+    previous = _timeseries_previous(request)
+    return JsonResponse({
+        'success': True,
+        'start': start.strftime('%Y-%m'),
+        'end': end.strftime('%Y-%m'),
+        'months': [
+            {
+                'month': month.strftime('%Y-%m'),
+                'label': get_month_key(month),
+                **as_json_totals({key: summary[key] for key in empty_totals()}),
+            }
+            for month, summary in sorted(summaries.items())
+        ],
+        'previous': previous.strftime('%Y-%m') if previous else None,
     })
 
 
+def _net_worth_etag(request) -> str:
+    return hashlib.md5(f"{request.GET.urlencode()}:{data_version()}".encode()).hexdigest()
+
+
+@require_GET
+@cache_control(max_age=0, must_revalidate=True)
+@condition(etag_func=_net_worth_etag)
+def net_worth(request):
+    """JSON net-worth series with month-over-month deltas, rolling averages and YoY growth.
+
+    ?start=YYYY-MM&end=YYYY-MM (inclusive) limit the months returned; the
+    trends are always computed over the full history.
+    """
+    try:
+        start, end = parse_month_range(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'months': [
+            as_json_point(point) for point in net_worth_series()
+            if (start is None or point['month'] >= start) and (end is None or point['month'] <= end)
+        ],
+    })
+
+
+# /changes/stream/ timings (ASGI): how often it checks the change log, how
+# long a quiet stream waits before a keepalive comment, and how long a
+# connection lasts before the browser reconnects with Last-Event-ID.
+# Under WSGI a stream answers once and the browser reconnects after
+# CHANGE_STREAM_RETRY_MS, so it never holds a worker.
+CHANGE_POLL_SECONDS = 2
+CHANGE_KEEPALIVE_SECONDS = 15
+CHANGE_STREAM_SECONDS = 300
+CHANGE_STREAM_RETRY_MS = 3000
+
+
+def _parse_cursor(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, '') else None
+    except ValueError:
+        raise ValueError(f"invalid cursor {value!r}")
+
+
+@require_GET
+@cache_control(no_store=True)
+def changes(request):
+    """Rows and month totals changed since ?since=<cursor> (see tracker.changes).
+
+    Without a cursor, returns the current one and no changes.
+    """
+    try:
+        cursor = _parse_cursor(request.GET.get('since'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if cursor is None:
+        return JsonResponse({'cursor': latest_cursor(), 'reload': False, 'months': {}})
+    return JsonResponse(changes_since(cursor))
+
+
+def _change_event(cursor: int) -> Tuple[int, Optional[str]]:
+    """The next SSE message after cursor, if anything changed, and the cursor after it"""
+    feed = changes_since(cursor)
+    if feed['cursor'] == cursor and not feed['months'] and not feed['reload']:
+        return cursor, None
+    return feed['cursor'], f"id: {feed['cursor']}\nevent: changes\ndata: {json.dumps(feed)}\n\n"
+
+
+def _sync_change_events(cursor: int):
+    # One check, then the response ends and EventSource reconnects after the retry delay
+    yield f"retry: {CHANGE_STREAM_RETRY_MS}\n\n"
+    _, message = _change_event(cursor)
+    if message is not None:
+        yield message
+
+
+async def _async_change_events(cursor: int):
+    deadline = time.monotonic() + CHANGE_STREAM_SECONDS
+    last_sent = time.monotonic()
+    yield f"retry: {CHANGE_STREAM_RETRY_MS}\n\n"
+    while time.monotonic() < deadline:
+        cursor, message = await sync_to_async(_change_event)(cursor)
+        if message is None and time.monotonic() - last_sent >= CHANGE_KEEPALIVE_SECONDS:
+            message = ': keepalive\n\n'
+        if message is not None:
+            last_sent = time.monotonic()
+            yield message
+        await asyncio.sleep(CHANGE_POLL_SECONDS)
+
+
+@require_GET
+def change_stream(request):
+    """Server-Sent Events version of /changes/, starting from ?since= or Last-Event-ID.
+
+    Under ASGI the stream is an async generator that checks for changes
+    every CHANGE_POLL_SECONDS and closes after CHANGE_STREAM_SECONDS. Under
+    WSGI it checks once and closes, so it never ties up a worker; the page
+    polls /changes/ there instead (see entry_form). Either way EventSource
+    reconnects with Last-Event-ID, so no change is missed.
+    """
+    try:
+        cursor = _parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('since'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if cursor is None:
+        cursor = latest_cursor()
+
+    events = _async_change_events(cursor) if isinstance(request, ASGIRequest) else _sync_change_events(cursor)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Don't let a proxy buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Per-view query counts and latencies recorded by this process (local requests or DEBUG only)"""
+    if not settings.DEBUG and request.META.get('REMOTE_ADDR') not in ('127.0.0.1', '::1'):
+        raise Http404
+    return JsonResponse({'success': True, 'views': view_stats()})
+
+
+def _locked_entries():
+    # Locks the entry rows (not their accounts) until the transaction ends, so
+    # the delta applied to the month summary is taken against the stored amount
+    return MonthlyEntry.objects.select_related('account').select_for_update(of=('self',))
+
+
+def _save_amount(entry_id: int, amount: Money) -> MonthlyEntry:
+    with transaction.atomic():
+        entry = get_object_or_404(_locked_entries(), id=entry_id)
+        old_amount, entry.amount = entry.amount, amount
+        entry.save(update_fields=['amount', 'updated_at'])
+        apply_amount_change(entry.date, entry.account_type, entry.amount - old_amount)
+    return entry
+
+
 @csrf_exempt
-def update_amount(request, entry_id):
+async def update_amount(request, entry_id):
     """AJAX endpoint to update an entry amount"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Invalid request method'})
     
     try:
         data = json.loads(request.body)
-        entry = get_object_or_404(MonthlyEntry, id=entry_id)
-        entry.amount = Decimal(data.get('amount', 0))
-        entry.save()
-        
-        # Get all entries for the same month to recalculate totals
-        month_entries = MonthlyEntry.objects.filter(
-            date__year=entry.date.year,
-            date__month=entry.date.month
-        )
+        # The entry and its month summary change together, in one transaction
+        entry = await sync_to_async(_save_amount)(entry_id, Money.parse(data.get('amount', 0)))
         
-        # Calculate totals
-        totals = calculate_totals(month_entries)
+        # Month totals come from the incrementally updated summary row
+        totals = await asummary_month_totals(entry.date)
         
         # Return response with updated data
         return JsonResponse({
@@ -247,11 +521,87 @@ def update_amount(request, entry_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+def _save_amounts(amounts: Dict[int, Money]) -> Tuple[Dict[int, MonthlyEntry], Dict[date, Dict[str, Money]]]:
+    """Save new amounts by entry id and adjust their month summaries, returning the entries and the deltas.
+
+    Raises ValueError naming any unknown entries, before anything is written.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = _locked_entries().in_bulk(list(amounts))
+        missing = sorted(amounts.keys() - entries.keys())
+        if missing:
+            raise ValueError(f"Unknown entries: {missing}")
+
+        deltas: Dict[date, Dict[str, Money]] = {}
+        for entry_id, entry in entries.items():
+            month_deltas = deltas.setdefault(entry.date.replace(day=1), {})
+            month_deltas[entry.account_type] = month_deltas.get(entry.account_type, 0) + amounts[entry_id] - entry.amount
+            entry.amount = amounts[entry_id]
+            entry.updated_at = now
+
+        MonthlyEntry.objects.bulk_update(entries.values(), ['amount', 'updated_at'])
+        apply_amount_changes(deltas)
+    return entries, deltas
+
+
+@csrf_exempt
+async def update_amounts(request):
+    """AJAX endpoint to update many entry amounts at once.
+
+    Takes {"entries": [{"id": ..., "amount": ...}, ...]}, saves them with one
+    bulk_update and returns the new totals of every affected month.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    
+    try:
+        data = json.loads(request.body)
+        # Later edits of the same entry win
+        amounts = {int(item['id']): Money.parse(item.get('amount', 0)) for item in data.get('entries', [])}
+        if not amounts:
+            return JsonResponse({'success': False, 'error': 'No entries to update'})
+
+        entries, deltas = await sync_to_async(_save_amounts)(amounts)
+
+        return JsonResponse({
+            'success': True,
+            'entries': [{'id': entry.id, 'amount': float(entry.amount)} for entry in entries.values()],
+            'months': {
+                get_month_key(month): totals for month, totals in (await asummary_months_totals(deltas)).items()
+            },
+        })
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+
 def add_account(request):
-    """Add a new account to all months"""
+    """Add one or more new accounts to all months, as a background job.
+
+    Accepts the add-account form fields, or a JSON body of the form
+    {"accounts": [{"bank_name": ..., "account_name": ..., "account_type": ...}, ...]}
+    to onboard a batch of accounts in one request. JSON callers get the job
+    to poll; its result holds the number of entries created.
+    """
     if request.method != 'POST':
         return redirect('entry_form')
-    
+
+    if request.content_type == 'application/json':
+        try:
+            accounts = json.loads(request.body).get('accounts', [])
+            accounts = [
+                {key: account.get(key) for key in ('bank_name', 'account_name', 'account_type')}
+                for account in accounts
+            ]
+        except (ValueError, AttributeError) as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+
+        if not accounts or not all(all(account.values()) for account in accounts):
+            return JsonResponse({'success': False, 'error': 'Each account needs a bank, name and type'})
+
+        job = enqueue('add_accounts', accounts=accounts)
+        return JsonResponse({'success': True, 'accounts': len(accounts), 'job': job_status(job)}, status=202)
+
     bank_name = request.POST.get('bank_name')
     account_name = request.POST.get('account_name')
     account_type = request.POST.get('account_type')
@@ -259,71 +609,146 @@ def add_account(request):
     if not all([bank_name, account_name, account_type]):
         return redirect('entry_form')
     
-    # Get all unique months in the system
-    distinct_dates = MonthlyEntry.objects.dates('date', 'month', order='DESC')
-    
-    # Add this account to all months
-    for month_date in distinct_dates:
-        # Check if this account already exists for this month
-        if not MonthlyEntry.objects.filter(
-            date__year=month_date.year,
-            date__month=month_date.month,
-            bank_name=bank_name,
-            account_name=account_name
-        ).exists():
-            # Create new entry
-            MonthlyEntry.objects.create(
-                date=month_date,
-                bank_name=bank_name,
-                account_name=account_name,
-                account_type=account_type,
-                amount=0,
-                notes=""
-            )
-    
+    job = enqueue('add_accounts', accounts=[
+        {'bank_name': bank_name, 'account_name': account_name, 'account_type': account_type}
+    ])
+    # The add-account modal posts with fetch and waits for the job before reloading
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'success': True, 'job': job_status(job)}, status=202)
     return redirect('entry_form')
 
 
+def import_data(request):
+    """Upload a CSV export of balances and import it (see tracker.importing)"""
+    context = {}
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            context['error'] = 'Choose a CSV file to import'
+        else:
+            try:
+                context['report'] = import_entries(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+            except (ImportFileError, UnicodeDecodeError) as e:
+                context['error'] = str(e)
+    return TemplateResponse(request, 'tracker/import_form.html', context)
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
+
+
+@require_GET
+def export_entries(request, export_format):
+    """Stream entries as CSV or NDJSON.
+
+    Optional filters: ?start=YYYY-MM&end=YYYY-MM (inclusive), ?bank=<bank name>
+    and ?type=<account type>.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404(f"Unknown export format {export_format!r}")
+    try:
+        start, end = parse_month_range(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    account_type = request.GET.get('type')
+    if account_type and account_type not in ACCOUNT_TYPE_KEYS:
+        return JsonResponse({'success': False, 'error': f"Unknown account type {account_type!r}"}, status=400)
+
+    serialize, content_type = EXPORT_FORMATS[export_format]
+    rows = export_rows(start=start, end=end, bank_name=request.GET.get('bank'), account_type=account_type)
+    response = StreamingHttpResponse(serialize(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="entries.{export_format}"'
+    return response
+
+
 def reset_data(request):
-    """Helper view to reset all data"""
+    """Helper view to reset all data (in a background job the page then follows)"""
     if request.method == 'POST':
-        # Delete all existing entries
-        MonthlyEntry.objects.all().delete()
-        # Regenerate data
-        generate_year_data()
-        return redirect('entry_form')
-    return render(request, 'tracker/reset_confirm.html')
+        job = enqueue('reset_data')
+        return TemplateResponse(request, 'tracker/reset_confirm.html', {'job': job_status(job)})
+    return TemplateResponse(request, 'tracker/reset_confirm.html')
+
+
+@require_GET
+@cache_control(no_store=True)
+def job_detail(request, job_id):
+    """Progress and result of a background job, polled by the UI"""
+    return JsonResponse(job_status(revive_job(get_object_or_404(Job, id=job_id))))
+
+
+def _rename_account(
+    entry: MonthlyEntry, bank_name: str, account_name: str, update_all_months: bool
+) -> Tuple[MonthlyEntry, Optional[Job]]:
+    """Rename the entry's account, or move entries onto another (possibly new) account.
+
+    Renaming across all months is a single-row update and moving one entry
+    is done inline; moving every month onto an existing account is queued
+    as a job. Returns the entry now holding the edited amount (the target
+    account's own entry when the two were merged) and the job, if any.
+    """
+    account = entry.account
+    with transaction.atomic():
+        target = Account.objects.filter(bank_name=bank_name, account_name=account_name).first()
+        if target is None and update_all_months:
+            account.bank_name = bank_name
+            account.account_name = account_name
+            account.save(update_fields=['bank_name', 'account_name'])
+            # Account names are shown in every month's cached groups
+            bump_all()
+            return entry, None
+
+        if update_all_months:
+            job = enqueue('move_account', account_id=account.id, target_id=target.id, month=entry.date.isoformat())
+            return entry, job
+
+        # Move just this entry onto the other (possibly new) account
+        if target is None:
+            target = Account.objects.create(
+                bank_name=bank_name,
+                account_name=account_name,
+                account_type=account.account_type
+            )
+        merged = move_entries(account.entries.filter(id=entry.id), target)
+        if not account.entries.exists():
+            account.delete()
+        if target.account_type != account.account_type:
+            refresh_summaries([entry.date])
+        bump_all()
+        entry.account = target
+        return merged.get(entry.date, entry), None
 
 
 @csrf_exempt
-def update_account(request, entry_id):
+async def update_account(request, entry_id):
     """AJAX endpoint to update account details (bank name and account name)"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Invalid request method'})
     
     try:
         data = json.loads(request.body)
-        entry = get_object_or_404(MonthlyEntry, id=entry_id)
-        
-        # Get current details for comparison
-        old_bank_name = entry.bank_name
-        old_account_name = entry.account_name
+        entry = await aget_object_or_404(MonthlyEntry.objects.select_related('account'), id=entry_id)
+        account = entry.account
         
-        # Update the entry with new details
-        entry.bank_name = data.get('bank_name', old_bank_name)
-        entry.account_name = data.get('account_name', old_account_name)
-        entry.save()
+        # Get the new details, defaulting to the current ones
+        bank_name = data.get('bank_name', account.bank_name)
+        account_name = data.get('account_name', account.account_name)
         
-        # Update other entries for the same account across all months if requested
-        if data.get('update_all_months', True):
-            MonthlyEntry.objects.filter(
-                bank_name=old_bank_name,
-                account_name=old_account_name
-            ).exclude(id=entry_id).update(
-                bank_name=entry.bank_name,
-                account_name=entry.account_name
-            )
+        update_all_months = data.get('update_all_months', True)
         
+        if (bank_name, account_name) != (account.bank_name, account.account_name):
+            entry, job = await sync_to_async(_rename_account)(entry, bank_name, account_name, update_all_months)
+            if job is not None:
+                return JsonResponse({
+                    'success': True,
+                    'id': entry.id,
+                    'bank_name': bank_name,
+                    'account_name': account_name,
+                    'job': job_status(job),
+                }, status=202)
+
+        # Plain renames don't move any amounts, so the month summaries are unchanged
         return JsonResponse({
             'success': True,
             'id': entry.id,
@@ -334,38 +759,38 @@ def update_account(request, entry_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 
+def _delete_account(entry: MonthlyEntry, all_months: bool) -> Optional[Job]:
+    """Delete the entry and refresh its month, or queue deleting its account across every month"""
+    account = entry.account
+    if all_months:
+        return enqueue('delete_account', account_id=account.id, month=entry.date.isoformat())
+
+    with transaction.atomic():
+        entry.delete()
+        if not account.entries.exists():
+            account.delete()
+    refresh_summaries([entry.date])
+    return None
+
+
 @csrf_exempt
-def delete_account(request, entry_id):
+async def delete_account(request, entry_id):
     """AJAX endpoint to delete an account"""
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'Invalid request method'})
     
     try:
-        entry = get_object_or_404(MonthlyEntry, id=entry_id)
-        
-        # Store details for finding similar entries
-        bank_name = entry.bank_name
-        account_name = entry.account_name
+        entry = await aget_object_or_404(MonthlyEntry.objects.select_related('account'), id=entry_id)
         month_date = entry.date
         
-        # Delete the entry
-        entry.delete()
+        all_months = request.GET.get('all_months', 'true').lower() == 'true'
+        job = await sync_to_async(_delete_account)(entry, all_months)
+        if job is not None:
+            # The job's result carries the month's refreshed totals
+            return JsonResponse({'success': True, 'month': get_month_key(month_date), 'job': job_status(job)}, status=202)
         
-        # Find and delete all similar entries across all months if requested
-        if request.GET.get('all_months', 'true').lower() == 'true':
-            MonthlyEntry.objects.filter(
-                bank_name=bank_name,
-                account_name=account_name
-            ).delete()
-        
-        # Recalculate totals for the affected month
-        month_entries = MonthlyEntry.objects.filter(
-            date__year=month_date.year,
-            date__month=month_date.month
-        )
-        
-        # Calculate totals
-        totals = calculate_totals(month_entries)
+        # Totals for the affected month, from the refreshed summary
+        totals = await asummary_month_totals(month_date)
         
         return JsonResponse({
             'success': True,
@@ -373,4 +798,4 @@ def delete_account(request, entry_id):
             'totals': totals
         })
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)})
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': str(e)})